@@ -1,78 +1,469 @@
+import base64
 import http.client
 import json
+import os
+import re
+import threading
+import time
+import warnings
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compressed bodies are read and inflated this much at a time
+READ_SIZE = 1024 * 1024
+# and a Buffer's byte list is read into bytes this many digits at a time. Without numpy every value
+# is a bytes object for a moment, so this is kept well under READ_SIZE
+DECODE_SIZE = 64 * 1024
+# Node serializes a Buffer as {"type":"Buffer","data":[byte, byte, ...]}
+BUFFER_START = re.compile(rb'\{\s*"type"\s*:\s*"Buffer"\s*,\s*"data"\s*:\s*\[')
+BUFFER_PLACEHOLDER = "\u0000buffer:"
+
 class Response:
 
     status = None
     reason = None
     data = None
+    # Response headers with lowercase names
+    headers = {}
+    # Bytes on the wire, and after decompressing
+    size = 0
+    decodedSize = 0
 
     def __init__(self, res):
+        # Always drain the body so the connection can be reused for the next request
+        body, self.size = readBody(res)
+        self.decodedSize = len(body)
+        self.headers = {name.lower(): value for name, value in res.getheaders()}
+
         if (res.status == 200):
             try:
-                self.data = json.loads(res.read().decode("utf-8"))
+                self.data = decodeJson(body)
             except Exception:
                 pass
-        
+
         self.status = res.status
         self.reason = res.reason
 
+class FailedResponse(Response):
+
+    # Stands in for a request that never got a response, so one bad file doesn't stop a batch
+    def __init__(self, error):
+        self.reason = f"{type(error).__name__}: {error}"
+
+class CachedResponse(Response):
+
+    # Stands in for a request we didn't need to make because the data is already cached locally
+    def __init__(self, data):
+        self.status = 200
+        self.reason = "Cached"
+        self.data = data
+
+class ConnectionPool:
+
+    host = None
+    isProd = False
+    size = 16
+    idleTimeout = 30
+    timeout = 30
+
+    def __init__(self, host, isProd, size=16, idleTimeout=30, timeout=30):
+        self.host = host
+        self.isProd = isProd
+        self.size = size
+        self.idleTimeout = idleTimeout
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Hands out the most recently used idle connection, or a new one. The second value says
+        # whether the connection was reused, since only those can have gone stale on the server
+        now = time.monotonic()
+        with self.lock:
+            while self.idle:
+                conn, lastUsed = self.idle.pop()
+                if now - lastUsed < self.idleTimeout:
+                    return conn, True
+                conn.close()
+
+        if self.isProd:
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout), False
+        return http.client.HTTPConnection(self.host, timeout=self.timeout), False
+
+    def release(self, conn):
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn, _ in idle:
+            conn.close()
+
 class Api:
 
     isProd = False
+    binaryMesh = False
     accessToken = None
+    tokenExpires = None
     baseUrl = None
-        
-    def __init__(self):
-        configFile = (Path(__file__).parent / "config2.json").resolve()
-        with open(configFile, "r") as f:
-            config = json.load(f)
-
-            self.isProd = config["isProd"]
-            self.baseUrl = config["api"]["url"]
-
-            payload = json.dumps({
-                "email": config["api"]["email"],
-                "password": config["api"]["password"]
-            })
-            
-            headers = {
-                "content-type": "application/json"
-            }
-
-            conn = http.client.HTTPSConnection(self.baseUrl) if self.isProd else http.client.HTTPConnection(self.baseUrl)
-            conn.request("POST", "/api/user/token", payload, headers)
-            res = conn.getresponse()
+    tokenCache = None
+    tokenLifetime = 3600
+    compress = True
+    poolSize = 16
+    idleTimeout = 30
+    timeout = 30
+    concurrency = 16
+    profile = False
+    batchRailMoves = False
+    deferCompute = False
+    indexMesh = False
+    meshTolerance = None
+    meshBudget = None
+    meshMaxDeviation = None
+    parseWorkers = 0
+    templateCache = False
+    saveAnchors = False
+
+    # One pool per base URL, shared by every Api instance in the process
+    pools = {}
+    poolsLock = threading.Lock()
+
+    def __init__(self, config=None):
+        if config is None:
+            configFile = (Path(__file__).parent / "config2.json").resolve()
+            with open(configFile, "r") as f:
+                config = json.load(f)
+
+        self.isProd = config["isProd"]
+        self.baseUrl = config["api"]["url"]
+        self.binaryMesh = config.get("binaryMesh", False)
+        self.poolSize = config["api"].get("poolSize", self.poolSize)
+        self.idleTimeout = config["api"].get("idleTimeout", self.idleTimeout)
+        self.timeout = config["api"].get("timeout", self.timeout)
+        self.concurrency = config["api"].get("concurrency", self.concurrency)
+        self.compress = config["api"].get("compress", self.compress)
+        self.profile = config.get("profile", False)
+        self.batchRailMoves = config.get("batchRailMoves", False)
+        self.deferCompute = config.get("deferCompute", False)
+        self.indexMesh = config.get("indexMesh", False)
+        self.meshTolerance = config.get("meshTolerance", None)
+        self.meshBudget = config.get("meshBudget", None)
+        self.meshMaxDeviation = config.get("meshMaxDeviation", None)
+        self.parseWorkers = config.get("parseWorkers", 0)
+        self.templateCache = config.get("templateCache", False)
+        self.saveAnchors = config.get("saveAnchors", False)
+
+        # Tokens are cached on disk until they expire so a new launch doesn't have to log in again.
+        # A tokenCache of None turns that off
+        defaultCache = str((Path(__file__).parent / "tokenCache.json").resolve())
+        self.tokenCache = config["api"].get("tokenCache", defaultCache)
+        self.tokenLifetime = config["api"].get("tokenLifetime", self.tokenLifetime)
+
+        # Totals for the run report, see stats()
+        self.calls = 0
+        self.bytesSent = 0
+        self.bytesReceived = 0
+        self.statsLock = threading.Lock()
+
+        # Nothing is sent until the first request, see authenticate
+        self.credentials = {
+            "email": config["api"]["email"],
+            "password": config["api"]["password"]
+        }
+        self.authLock = threading.Lock()
+
+    def authenticate(self, staleToken=None):
+        # Gets a token, from the token cache if it holds a live one, otherwise by logging in.
+        # staleToken is a token the server just turned down. Requests that all got a 401 for the same
+        # token wait here on the first one's refresh and then share its new token
+        with self.authLock:
+            if self.accessToken is not None and self.accessToken != staleToken:
+                return self.accessToken
+
+            cached = self.readTokenCache()
+            if cached is not None and cached["token"] != staleToken:
+                self.accessToken, self.tokenExpires = cached["token"], cached["expires"]
+                return self.accessToken
+
+            res = self.send("POST", "/api/user/token", self.credentials)
 
             if res.status != 200:
                 raise Exception(f"Could not authenticate. Response: {res.status} - {res.reason}")
 
-            data = json.loads(res.read().decode("utf-8"))
-            self.accessToken = data["token"]
+            token = res.data["token"] if res.data is not None else None
 
-            if self.accessToken == None:
+            if token == None:
                 raise Exception("Could not get access token.")
-        
 
-    def get(self, endpoint):
+            self.accessToken, self.tokenExpires = token, tokenExpiry(res.data, time.time() + self.tokenLifetime)
+            self.writeTokenCache()
+            return self.accessToken
+
+    def tokenCacheKey(self):
+        return f"{self.baseUrl} {self.credentials['email']}"
+
+    def readTokenCache(self):
+        if self.tokenCache is None:
+            return None
+        try:
+            with open(self.tokenCache, "r") as f:
+                cached = json.load(f).get(self.tokenCacheKey())
+        except (OSError, ValueError, AttributeError):
+            return None
+
+        # Leave a minute's margin so a token doesn't run out partway through a run
+        if cached is None or cached.get("expires", 0) < time.time() + 60:
+            return None
+        return cached
+
+    def writeTokenCache(self):
+        if self.tokenCache is None:
+            return
+        try:
+            with open(self.tokenCache, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        now = time.time()
+        entries = {key: entry for key, entry in entries.items() if entry.get("expires", 0) > now}
+        entries[self.tokenCacheKey()] = {"token": self.accessToken, "expires": self.tokenExpires}
+
+        # Only readable by the user, it holds a live token
+        tempPath = f"{self.tokenCache}.tmp"
+        fd = os.open(tempPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        os.replace(tempPath, self.tokenCache)
+
+    def pool(self):
+        with Api.poolsLock:
+            pool = Api.pools.get(self.baseUrl)
+            if pool is None:
+                pool = ConnectionPool(self.baseUrl, self.isProd, self.poolSize, self.idleTimeout, self.timeout)
+                Api.pools[self.baseUrl] = pool
+            return pool
+
+    def request(self, method, endpoint, request=None, headers=None):
+        token = self.accessToken or self.authenticate()
+        response = self.send(method, endpoint, request, token, headers)
+
+        if response.status == 401:
+            # The token expired or was revoked. Get a new one once and try again
+            token = self.authenticate(staleToken=token)
+            response = self.send(method, endpoint, request, token, headers)
+
+        return response
+
+    def send(self, method, endpoint, request=None, token=None, extraHeaders=None):
+        # extraHeaders are added to the request's own, e.g. If-None-Match for a conditional GET
         headers = {
             "content-type": "application/json",
-            "Authorization": self.accessToken
+            "accept-encoding": ACCEPT_ENCODING if self.compress else "identity"
         }
+        if token is not None:
+            headers["Authorization"] = token
+        if extraHeaders:
+            headers.update(extraHeaders)
+
+        body = json.dumps(request) if request is not None else None
+        pool = self.pool()
+
+        while True:
+            conn, reused = pool.acquire()
+            try:
+                conn.request(method, endpoint, body, headers)
+                res = conn.getresponse()
+                response = Response(res)
+            except ConnectionError:
+                # The server dropped a keep-alive connection while it sat idle. Retry on a new one.
+                # Depending on the platform that's a reset, a broken pipe or, on Windows, an abort
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if res.will_close:
+                conn.close()
+            else:
+                pool.release(conn)
+
+            with self.statsLock:
+                self.calls += 1
+                self.bytesSent += len(body) if body is not None else 0
+                self.bytesReceived += response.size
+            return response
 
-        conn = http.client.HTTPSConnection(self.baseUrl) if self.isProd else http.client.HTTPConnection(self.baseUrl)
-        conn.request("GET", endpoint, None, headers)
-        res = conn.getresponse()
-        return Response(res)
+    def get(self, endpoint, headers=None):
+        return self.request("GET", endpoint, headers=headers)
 
     def post(self, endpoint, request):
-        headers = {
-            "content-type": "application/json",
-            "Authorization": self.accessToken
-        }
+        return self.request("POST", endpoint, request)
+
+    def getMany(self, endpoints, concurrency=None):
+        # Fetches the endpoints on a thread pool and yields their responses in the order given, so the
+        # caller can work through them on Fusion's thread while the rest download. No more than twice
+        # concurrency requests are queued or waiting at once, since each response can carry a full
+        # mesh. A request that fails outright comes back as a FailedResponse instead of raising. An
+        # endpoint can also be (endpoint, headers) to send extra headers with it
+        concurrency = concurrency or self.concurrency
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            for endpoint in endpoints:
+                endpoint, headers = endpoint if isinstance(endpoint, tuple) else (endpoint, None)
+                pending.append(executor.submit(self.tryGet, endpoint, headers))
+                if len(pending) > concurrency * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Don't download the rest if the caller stops early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def tryGet(self, endpoint, headers=None):
+        try:
+            return self.get(endpoint, headers)
+        except Exception as e:
+            return FailedResponse(e)
+
+    def stats(self):
+        with self.statsLock:
+            return {"calls": self.calls, "bytesSent": self.bytesSent, "bytesReceived": self.bytesReceived}
+
+    def close(self):
+        pool = Api.pools.pop(self.baseUrl, None)
+        if pool is not None:
+            pool.close()
+
+def tokenExpiry(data, default):
+    # When the token runs out: the response's expiresIn if it has one, else the token's own exp claim
+    # if it's a JWT, else default. Nothing here checks the signature, the server does that
+    if isinstance(data.get("expiresIn"), (int, float)):
+        return time.time() + data["expiresIn"]
+    try:
+        payload = data["token"].split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except Exception:
+        return default
+
+ACCEPT_ENCODING = "zstd, gzip" if zstandard is not None else "gzip"
+
+def readBody(res):
+    # The body with any content encoding undone, inflated a chunk at a time into one buffer so the
+    # whole compressed body is never held next to the whole inflated one. Also returns the number
+    # of bytes that came over the wire
+    encoding = (res.getheader("content-encoding") or "identity").strip().lower()
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "zstd" and zstandard is not None:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    elif encoding == "identity":
+        body = res.read()
+        return body, len(body)
+    else:
+        res.read()
+        raise Exception(f"Unsupported content encoding: {encoding}")
+
+    body = bytearray()
+    received = 0
+    while True:
+        chunk = res.read(READ_SIZE)
+        if not chunk:
+            break
+        received += len(chunk)
+        body += decompressor.decompress(chunk)
+    if encoding == "gzip":
+        body += decompressor.flush()
+    return body, received
+
+def decodeJson(body):
+    # json.loads, except Node Buffers come back as bytes instead of a list with an int per byte. Each
+    # Buffer's byte list is cut out of the body and read straight into bytes, so the mesh data never
+    # exists as a str or a list of ints. A Buffer that doesn't read cleanly is left to json.loads
+    buffers = []
+    parts = []
+    position = 0
+    for match in BUFFER_START.finditer(body):
+        if match.start() < position:
+            continue
+        end = body.find(b"]", match.end())
+        if end < 0:
+            break
+        data = decodeBuffer(body, match.end(), end)
+        if data is None:
+            continue
+        parts.append(body[position:match.end() - 1])
+        parts.append(json.dumps(f"{BUFFER_PLACEHOLDER}{len(buffers)}").encode())
+        buffers.append(data)
+        position = end + 1
+
+    if not buffers:
+        return json.loads(body)
+
+    parts.append(body[position:])
+    return restoreBuffers(json.loads(b"".join(parts)), buffers)
+
+def decodeBuffer(body, start, end):
+    # body[start:end] is "12,0,255,..." to bytes, or None if it isn't a list of byte values. Read a
+    # chunk of digits at a time so nothing the size of the whole list is ever made besides the bytes
+    if body.count(b",", start, end) == 0 and not body[start:end].strip():
+        return b""
+
+    data = bytearray()
+    while start < end:
+        cut = body.find(b",", min(start + DECODE_SIZE, end), end)
+        cut = end if cut < 0 else cut
+        values = decodeBytes(bytes(body[start:cut]))
+        if values is None:
+            return None
+        data += values
+        start = cut + 1
+    return bytes(data)
+
+def decodeBytes(digits):
+    if np is not None:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                values = np.fromstring(digits, dtype=np.int32, sep=",")
+            except (DeprecationWarning, ValueError):
+                return None
+        if len(values) != digits.count(b",") + 1 or ((values < 0) | (values > 255)).any():
+            return None
+        return values.astype(np.uint8).tobytes()
+
+    try:
+        return bytes(map(int, digits.split(b",")))
+    except ValueError:
+        return None
 
-        conn = http.client.HTTPSConnection(self.baseUrl) if self.isProd else http.client.HTTPConnection(self.baseUrl)
-        conn.request("POST", endpoint, json.dumps(request), headers)
-        res = conn.getresponse()
-        return Response(res)
+def restoreBuffers(value, buffers):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            value[key] = restoreBuffers(item, buffers)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            value[i] = restoreBuffers(item, buffers)
+    elif isinstance(value, str) and value.startswith(BUFFER_PLACEHOLDER):
+        return buffers[int(value[len(BUFFER_PLACEHOLDER):])]
+    return value
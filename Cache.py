@@ -0,0 +1,202 @@
+import hashlib
+import json
+import time
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class MeshCache:
+
+    # On-disk cache of builder file payloads and their parsed meshes, so rerunning an order after a
+    # crash or a failed fit skips both the download and parseStl. Payloads are kept per file id with
+    # the ETag and Last-Modified of the response they came in, and are only used once the server
+    # answers a conditional GET with those (see validators) with a 304. The listing only carries ids
+    # and names, so it can't tell us a file changed. A payload the server gave neither header for is
+    # never served from here, though its mesh still is.
+    # Meshes are stored by a hash of their .stl bytes as raw little endian float32 files, which load
+    # back as memory maps. The least recently used entries are evicted once the cache passes maxBytes
+
+    path = None
+    maxBytes = 2 * 1024 ** 3
+    index = None
+    hits = 0
+    misses = 0
+    meshHits = 0
+    meshMisses = 0
+
+    def __init__(self, path=None, maxBytes=None):
+        self.path = Path(path) if path is not None else (Path(__file__).parent / "cache").resolve()
+        if maxBytes is not None:
+            self.maxBytes = maxBytes
+        self.index = {"files": {}, "meshes": {}}
+
+        try:
+            with open(self.path / "index.json", "r") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def version(file):
+        # Anything that changes in the file's listing entry invalidates what we have for it too
+        return hashlib.sha256(json.dumps(file, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def meshKey(meshData):
+        # Same inputs parseStl takes: ascii text, raw bytes, or the list of byte values from the api
+        if isinstance(meshData, str):
+            meshData = meshData.encode()
+        elif not isinstance(meshData, (bytes, bytearray, memoryview)):
+            meshData = bytes(meshData)
+        return hashlib.sha256(meshData).hexdigest()
+
+    def getPayload(self, fileId, version):
+        # The cached payload has its mesh swapped for {"key": <mesh key>}, see getMesh
+        # A payload whose mesh files are gone is no use either, it has to be downloaded again
+        entry = self.index["files"].get(str(fileId))
+        if entry is None or entry["version"] != version or not self.hasMesh(entry["mesh"]) or not self.validators(fileId):
+            self.misses += 1
+            return None
+
+        try:
+            with open(self.path / entry["name"], "r") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        entry["lastUsed"] = time.time()
+        self.hits += 1
+        return payload
+
+    def validators(self, fileId):
+        # Headers that make the GET for a cached payload conditional, {} if there's nothing to send
+        entry = self.index["files"].get(str(fileId)) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def putPayload(self, fileId, version, payload, meshKey, headers=None):
+        # headers are the response's, with lowercase names like Api.Response keeps them
+        headers = headers or {}
+        payload = dict(payload, mesh={"key": meshKey})
+        name = f"file-{fileId}.json"
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / name, "w") as f:
+            json.dump(payload, f)
+
+        self.index["files"][str(fileId)] = {
+            "version": version,
+            "name": name,
+            "mesh": meshKey,
+            "etag": headers.get("etag"),
+            "lastModified": headers.get("last-modified"),
+            "size": (self.path / name).stat().st_size,
+            "lastUsed": time.time()
+        }
+        self.evict(keep=name)
+
+    def meshPaths(self, key):
+        return [self.path / f"mesh-{key}.coordinates.f32", self.path / f"mesh-{key}.normals.f32"]
+
+    def hasMesh(self, key):
+        return key in self.index["meshes"] and all(path.exists() for path in self.meshPaths(key))
+
+    def getMesh(self, key):
+        # Returns (meshName, coordinates, normalVectors) like parseStl, or None
+        entry = self.index["meshes"].get(key)
+        if entry is None:
+            self.meshMisses += 1
+            return None
+
+        try:
+            coordinates, normalVectors = (readFloats(path) for path in self.meshPaths(key))
+        except OSError:
+            # Files evicted by a run that crashed before saving the index. Forget the mesh so the
+            # payloads pointing at it are downloaded again
+            del self.index["meshes"][key]
+            self.meshMisses += 1
+            return None
+
+        entry["lastUsed"] = time.time()
+        self.meshHits += 1
+        return entry["meshName"], coordinates, normalVectors
+
+    def putMesh(self, key, meshName, coordinates, normalVectors):
+        self.path.mkdir(parents=True, exist_ok=True)
+        coordinatesPath, normalsPath = self.meshPaths(key)
+        writeFloats(coordinatesPath, coordinates)
+        writeFloats(normalsPath, normalVectors)
+
+        self.index["meshes"][key] = {
+            "meshName": meshName,
+            "size": (len(coordinates) + len(normalVectors)) * 4,
+            "lastUsed": time.time()
+        }
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        entries = [("files", fileId, entry) for fileId, entry in self.index["files"].items()]
+        entries += [("meshes", key, entry) for key, entry in self.index["meshes"].items()]
+        total = sum(entry["size"] for _, _, entry in entries)
+
+        for kind, key, entry in sorted(entries, key=lambda item: item[2]["lastUsed"]):
+            if total <= self.maxBytes:
+                break
+            if key == keep or entry.get("name") == keep:
+                continue
+
+            paths = [self.path / entry["name"]] if kind == "files" else self.meshPaths(key)
+            try:
+                for path in paths:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                # Windows won't delete a mesh that is still memory mapped. It goes next time
+                continue
+
+            del self.index[kind][key]
+            total -= entry["size"]
+
+    def save(self):
+        if not self.path.exists():
+            return
+        tempPath = self.path / "index.tmp"
+        with open(tempPath, "w") as f:
+            json.dump(self.index, f)
+        tempPath.replace(self.path / "index.json")
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "meshHits": self.meshHits,
+            "meshMisses": self.meshMisses,
+            "bytes": sum(e["size"] for kind in ("files", "meshes") for e in self.index[kind].values())
+        }
+
+def readFloats(path):
+    if np is not None:
+        if path.stat().st_size == 0:
+            return np.empty(0, np.float32)
+        return np.memmap(path, dtype="<f4", mode="r")
+
+    floats = array("f")
+    with open(path, "rb") as f:
+        floats.frombytes(f.read())
+    return floats
+
+def writeFloats(path, floats):
+    tempPath = path.with_suffix(".tmp")
+    with open(tempPath, "wb") as f:
+        if np is not None:
+            np.asarray(floats, dtype="<f4").tofile(f)
+        else:
+            array("f", floats).tofile(f)
+    tempPath.replace(path)
@@ -0,0 +1,36 @@
+class DeferredCompute:
+
+    # Turns the design's compute off for the edits inside the with block, so it recomputes once when
+    # the block ends instead of after every sketch move and move feature. Compute is turned back on
+    # even if the block raises. Designs that won't defer compute just run the block as before.
+    # mode is "design" when compute was deferred, "unsupported" when the design wouldn't, and None
+    # when disabled or something outside had already deferred it
+
+    design = None
+    enabled = True
+    mode = None
+
+    def __init__(self, design, enabled=True):
+        self.design = design
+        self.enabled = enabled
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+
+        try:
+            if not self.design.isComputeDeferred:
+                self.design.isComputeDeferred = True
+                self.mode = "design"
+        except (AttributeError, RuntimeError):
+            # Deferring sketch by sketch instead wouldn't save anything, each sketch only moves once
+            # outside of rail_mover, which already defers its own
+            self.mode = "unsupported"
+
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        # Turning compute back on is what runs the one recompute
+        if self.mode == "design":
+            self.design.isComputeDeferred = False
+        return False
@@ -1,14 +1,29 @@
 #Author: Ben Scire
 #Script to auotmatically create fusion files for orders in the travelers
-import adsk.core, adsk.fusion, traceback, requests, math, sys
-from . import Api
+import adsk.core, adsk.fusion, traceback, json, math, sys
+from . import Api, Cache, Compute, FitIndex, Fitting, FolderIndex, Handles, IndexedMesh, ListingCache, OrderIndex, RunReport, TemplateCache
+from .Stl import parseStl, parseStlFile, parseStlParallel
 from datetime import date
+from pathlib import Path
 
 app = adsk.core.Application.get()
 ui  = app.userInterface
 des = app.activeProduct
 root = des.rootComponent
+#Doesn't log in until the first request, and reuses a cached token when it can
 api = Api.Api()
+#Timings per stage and per order, written to the reports folder at the end of the run
+report = RunReport.RunReport(profile=api.profile)
+orderIndex = OrderIndex.OrderIndex()
+cache = Cache.MeshCache()
+#The builder file listing from the last run, so an unchanged queue isn't downloaded again
+listingCache = ListingCache.ListingCache()
+#Fusion files earlier runs copied and fit, so a rerun doesn't make another copy of the same fit
+fitIndex = FitIndex.FitIndex()
+#Starter files saved locally per version, for opening orders without a cloud copy (templateCache)
+templateCache = TemplateCache.TemplateCache()
+#Grabbing production folder by unique folder ID. Its subfolders and starter files are looked up by name
+folderIndex = FolderIndex.FolderIndex(lambda: app.data.findFolderById('urn:adsk.wipprod:fs.folder:co.EgnkouHiTqeVUlInebHVzg'))
 
 def getOrder(data):
     #This is pulling all the data from the travelers, same as Icarus Add In with some added variables 
@@ -43,142 +58,37 @@ def getOrder(data):
         return None
 
 
-def parseStl(meshData):
-    meshName = ""
-    coordinates = []
-    normalVectors = []
-
-    # Decode the data and split into individual lines
-    bytes = bytearray(meshData)
-    lines = bytes.splitlines()
-
-    # Iterate over lines
-    for i, lineBytes in enumerate(lines):
-
-        # Split the line by spaces
-        line = lineBytes.decode().strip().split(" ")
-
-        # First line of file has format "solid <mesh name>"
-        if i == 0:
-            if line[0] != "solid":
-                raise Exception("First line of the .stl must start with 'solid'")
-            meshName = line[1]
-
-        # Last line of file has format "endsolid <mesh name>"
-        elif i == len(lines) - 1:
-            if line[0] != "endsolid":
-                raise Exception("Last line of the .stl must start with 'endsolid'")
-            if line[1] != meshName:
-                raise Exception("Last line of the .stl must end with the mesh name")
-
-        # First line in group of 7 has format "facet normal <x> <y> <z>"
-        elif (i - 1) % 7 == 0:
-            if line[0] != "facet" or line[1] != "normal":
-                raise Exception(f"Line {i} of the .stl must begin with 'facet normal'")
-            normalVectors.append(float(line[2]))
-            normalVectors.append(float(line[3]))
-            normalVectors.append(float(line[4]))
-
-        # Second line in group of 7 is "outer loop"
-        elif (i - 2) % 7 == 0:
-            if line[0] != "outer" or line[1] != "loop":
-                raise Exception(f"Line {i} of the .stl must be 'outer loop'")
-
-        # Third, fourth, and fifth lines in group of 7 have format "vertex <x> <y> <z>"
-        elif (i - 3) % 7 == 0 or (i - 4) % 7 == 0 or (i - 5) % 7 == 0:
-            if line[0] != "vertex":
-                raise Exception(f"Line {i} of the .stl must begin with 'vertex'")
-            coordinates.append(float(line[1]))
-            coordinates.append(float(line[2]))
-            coordinates.append(float(line[3]))
-
-        # Sixth line in group of 7 is "endloop"
-        elif (i - 6) % 7 == 0:
-            if line[0] != "endloop":
-                raise Exception(f"Line {i} of the .stl must be 'endloop'")
-
-        # Seventh line in group of 7 is "endfacet"
-        elif (i - 7) % 7 == 0:
-            if line[0] != "endfacet":
-                raise Exception(f"Line {i} of the .stl must be 'endfacet'")
-
-        # Should never hit this case
-        else:
-            raise Exception(f"Parsing failed for .stl on line {i}")
-
-    return meshName, coordinates, normalVectors
-
-def file_copy(fileName, rigid, model):
-    #This function grabs the proper starter file and creates a copy into the production folder 
-
-    productionFolder = app.data.findFolderById('urn:adsk.wipprod:fs.folder:co.EgnkouHiTqeVUlInebHVzg') #Grabbing production folder by unique folder ID
-    #searching through production subFolders by name to grab relevant folders
-    for folder in productionFolder.dataFolders:
-        if folder.name == '2024 Patient Files':
-            patientFilesFolder = folder
-        elif folder.name == 'Ascender Fitment Starters':
-            starterFileFolder = folder
-        elif folder.name == "KAFO":
-            kafoFolder = folder
-        elif folder.name == "Wireframe Test Fits":
-            testFits = folder
-
-    for file in starterFileFolder.dataFiles:
-        if file.name == "A3_Rigid_Base_File":
-            a3StarterRigid = file
-        elif file.name == "A3_Base_File":
-            a3Starter = file
-
-    for folder in kafoFolder.dataFolders:
-        if folder.name == "KAFO Starter Files":
-            kafoStarters = folder
-        if folder.name == "2024 KAFO Patient Files":
-            kafoPatients = folder
-
-    for file in kafoStarters.dataFiles:
-        if file.name == "A2_TAP_Starter_File":
-            tapStarter = file
-        elif file.name == "A2_TAD_Starter_File":
-            tadStarter = file
-        elif file.name == "A2_TPD_Starter_File":
-            tpdStarter = file
-        elif file.name == "A2_TPP_Starter_File":
-            tppStarter = file
-            
+def starterFile(fileName, rigid, model):
+    #Works out which starter file an order gets, the folder its copy goes in and the copy's name.
+    #Returns (starter path, folder path, file name) with the paths as folderIndex takes them
     if model == "KAFO - Custom":
         kafo = True
     else:
         kafo = False
 
     if kafo:
-        if fileName.split('_')[3] == "TAD":
-            activeDoc = tadStarter
-        if fileName.split('_')[3] == "TAP":
-            activeDoc = tapStarter
-        if fileName.split('_')[3] == "TPD":
-            activeDoc = tpdStarter
-        if fileName.split('_')[3] == "TPP":
-            activeDoc = tppStarter
+        kafoType = fileName.split('_')[3]
+        if kafoType not in ("TAD", "TAP", "TPD", "TPP"):
+            raise Exception(f"No KAFO starter file for type {kafoType}")
+        starterPath = ("KAFO", "KAFO Starter Files", f"A2_{kafoType}_Starter_File")
 
-        targetFolder = kafoPatients
+        folderPath = ("KAFO", "2024 KAFO Patient Files")
 
     else:
     #Deciding which starter file will be used based on order id input
         if rigid:
-            activeDoc = a3StarterRigid
+            starterPath = ("Ascender Fitment Starters", "A3_Rigid_Base_File")
         else:
-            activeDoc = a3Starter
+            starterPath = ("Ascender Fitment Starters", "A3_Base_File")
 
         #Grabbing the date and current month as a string to match with proper month folder
         today = date.today().strftime("%B %d, %Y")
         currentMonth = today.split()[0]
 
         #going inside patient files and finding folder that matches the current month 
-        for month in patientFilesFolder.dataFolders:
-            if month.name == currentMonth:
-                targetFolder = month
+        folderPath = ("2024 Patient Files", currentMonth)
 
-    #targetFolder = testFits
+    #folderPath = ("Wireframe Test Fits",)
 
     #setting fileName to our format
     fileNameChopped = fileName.split('_')
@@ -187,40 +97,156 @@ def file_copy(fileName, rigid, model):
     else:
          fileNameFormatted = fileNameChopped[0] + '_' + fileNameChopped[1] + '_' + fileNameChopped[2] + '_' + fileNameChopped[3]
 
+    return starterPath, folderPath, fileNameFormatted
+
+def file_copy(fileName, rigid, model):
+    #This function grabs the proper starter file and creates a copy into the production folder 
+
+    #Folders and files come out of folderIndex, which only lists each folder once per session
+    starterPath, folderPath, fileNameFormatted = starterFile(fileName, rigid, model)
+    activeDoc = folderIndex.file(*starterPath)
+    targetFolder = folderIndex.folder(*folderPath)
+
     #This is the actual command that copies the selected doc into the current month folder
     #if travelerStatus != "ARCHIVED":
     newFile = activeDoc.copy(targetFolder)
     newFile.name = fileNameFormatted
     return newFile
 
-def importFiles():
+def findCopy(fingerprint):
+    #The Fusion file an earlier run copied for this fingerprint and whether it was fit, or (None, False).
+    #Files that have since been deleted are forgotten
+    entry = fitIndex.get(fingerprint)
+    if entry is None:
+        return None, False
+
+    dataFile = app.data.findFileById(entry["fileId"])
+    if dataFile is None:
+        fitIndex.forget(fingerprint)
+        return None, False
+    return dataFile, entry["fitted"]
+
+def exportTemplate(dataFile, path):
+    #Saves the starter file's current version as a Fusion archive at path, see TemplateCache
+    with report.span("documents.open"):
+        doc = app.documents.open(dataFile, False)
+    try:
+        des = doc.products.itemByProductType('DesignProductType')
+        exportManager = des.exportManager
+        if not exportManager.execute(exportManager.createFusionArchiveExportOptions(str(path))):
+            raise Exception(f"Could not export starter file {dataFile.name}")
+    finally:
+        doc.close(False)
+
+def importFromTemplate(file, fileLabel, data, fingerprint, mesh):
+    #Fits a new document imported from the locally cached starter file and saves it into the patient
+    #folder, instead of copying the starter in the cloud and opening the copy. The builder file is
+    #only removed once the fit is saved, so a failed fit leaves no file behind and is retried next run
+    doc = None
+    try:
+        model = data['order']['catalog']['name']
+        starterPath, folderPath, fileNameFormatted = starterFile(data["name"], data['order']['hasRigidFrame'], model)
+        with report.span("template"):
+            templatePath = templateCache.get(folderIndex.file(*starterPath), exportTemplate)
+            targetFolder = folderIndex.folder(*folderPath)
+            doc = app.importManager.importToNewDocument(app.importManager.createFusionArchiveImportOptions(str(templatePath)))
+        with report.span("fitFrame"):
+            fitFrame(None, data["wireframe"], model == "KAFO - Custom", mesh, fingerprint, doc, (targetFolder, fileNameFormatted))
+        fitIndex.record(fingerprint, doc.dataFile.id, fileNameFormatted, True)
+    except Exception as e:
+        if doc is not None:
+            doc.close(False)
+        app.log(f"Import failed for file {fileLabel}")
+        return f"{fileLabel} failed to import: {e}"
+
+    try:
+        app.log(f"Import successful. Removing data for file {fileLabel}")
+        with report.span("delete"):
+            api.post(f"/api/fusionFile/{file['id']}/delete", {})
+        report.count("apiCalls")
+    except Exception as e:
+        return f"{fileLabel} imported and fit, could not remove it from the builder files: {e}"
+
+    return f"{fileLabel} imported and fit"
+
+def parseOrderIDs(text):
+    #Order IDs separated by commas or spaces, or "open" for every order whose status is Open (None)
+    if text.strip().lower() == "open":
+        return None
+    return text.replace(',', ' ').split()
+
+def importFiles(orderInput=None):
+    #Imports the builder files for a list of orders in one pass, sharing the file listing, the api
+    #session and the folder index between them. Returns {orderID: [result, ...]} and logs it per order
+    if orderInput is None:
+        orderInput, cancel = ui.inputBox('Enter Order ID(s), separated by commas, or "open" for all open orders')
+        if cancel:
+            return {}
+    orderIDs = parseOrderIDs(orderInput)
+
+    results = {orderID: [] for orderID in orderIDs} if orderIDs is not None else {}
 
-    orderID, cancel = ui.inputBox('Enter Order ID')
     # Get a list of all builder files ready for import
     app.log("Requesting builder files")
-    filesResponse = api.get("/api/fusionFile/all")
+    with report.span("listing"):
+        #Only comes down in full when it changed since the last run
+        filesResponse = listingCache.get(api, "/api/fusionFile/all")
 
     # Make sure the API request was successful
     if filesResponse.status != 200:
-        api.log(f"Could not get files. Response: {filesResponse.status} - {filesResponse.reason}")
-        return
+        app.log(f"Could not get files. Response: {filesResponse.status} - {filesResponse.reason}")
+        return results
 
     data = filesResponse.data
+    orderIndex.prune(data)
+
+    # Only download the files known to be for these orders, plus any we haven't seen before. Which
+    # orders are open is only known from the files themselves, so that needs all of them
+    if orderIDs is None:
+        wanted = data
+    else:
+        planned = set()
+        for orderID in orderIDs:
+            matches, unknown = orderIndex.plan(data, orderID)
+            planned.update(file['id'] for file in matches + unknown)
+        wanted = [file for file in data if file['id'] in planned]
+
+    # Binary meshes are a fraction of the size of ascii ones. parseStl reads either format
+    meshQuery = "?meshFormat=binary" if api.binaryMesh else ""
+
+    # Files we've already downloaded and parsed once come from the local cache, but only once the
+    # server has answered a conditional GET for them with a 304. The listing can't tell us a file
+    # changed, so that's the only way to know the cached wireframe and order are still current
+    with report.span("cache"):
+        cached = {file['id']: cache.getPayload(file['id'], cache.version(file)) for file in wanted}
+    endpoints = [(f"/api/fusionFile/{file['id']}{meshQuery}", cache.validators(file['id']) if cached[file['id']] is not None else None)
+                 for file in wanted]
+
+    # Download them in parallel. They still come back in list order, one at a time
+    app.log(f"Requesting data for {len(wanted)} of {len(data)} builder files, {sum(payload is not None for payload in cached.values())} cached")
+    downloads = api.getMany(endpoints)
     
     # Loop through the list of builder files ready for import
-    for file in data:
-        fileLabel = f"{file['name']} ({file['id']}"
-        
-        # Get the data for a specific builder file
-        app.log(f"Requesting data for file {fileLabel}")
-        fileResponse = api.get(f"/api/fusionFile/{file['id']}")
+    for file in wanted:
+        # Only the time spent waiting on a download counts, the rest overlaps with the imports
+        with report.span("download"):
+            fileResponse = next(downloads)
+        fileLabel = f"{file['name']} ({file['id']})"
+
+        if fileResponse.status == 304 and cached[file['id']] is not None:
+            report.count("cache.notModified")
+            fileResponse = Api.CachedResponse(cached[file['id']])
 
         # Make sure the API request was successful
         if fileResponse.status != 200:
-            app.log(f"Could not get file {fileLabel}). Response: {fileResponse.status} - {fileResponse.reason}")
+            app.log(f"Could not get file {fileLabel}. Response: {fileResponse.status} - {fileResponse.reason}")
             continue
 
+        # A body that wouldn't decode comes back as None
         data = fileResponse.data
+        if not isinstance(data, dict) or data.get("order") is None:
+            app.log(f"Could not get order data for file {fileLabel}")
+            continue
 
         # Get the order data for the file
         order = getOrder(data["order"])
@@ -229,77 +255,134 @@ def importFiles():
         if order is None:
             app.log(f"Could not get order data for file {fileLabel}")
             continue
+        orderIndex.record(file['id'], order['id'])
+
+        traveler_orderID = str(data['order']['id'])
+
+        if orderIDs is None and order["status"] == "Open":
+            results.setdefault(traveler_orderID, [])
+        if traveler_orderID in results:
+            with report.order(traveler_orderID):
+                if not isinstance(fileResponse, Api.CachedResponse):
+                    report.count("apiCalls")
+                    report.count("bytesReceived", fileResponse.size)
+                result = importFile(file, fileLabel, data, order, fileResponse.headers)
+            results[traveler_orderID].append(result)
+            report.result(traveler_orderID, result)
+
+    # Per order summary
+    for orderID, orderResults in results.items():
+        app.log(f"Order {orderID}: {'; '.join(orderResults) if orderResults else 'no builder file found'}")
+
+    return results
+
+def importFile(file, fileLabel, data, order, headers=None):
+    #Creates and fits the Fusion file for one builder file. Failures are returned rather than raised so
+    #the rest of a batch still gets imported. headers are the download's, cached along with the payload
+
+    # Check to make sure order is open
+    if order["status"] != "Open":
+        return f"{fileLabel} skipped, order is {order['status']}"
+
+    # A rerun for the same order, starter and wireframe reuses what the last run made. getOrder lets
+    # through orders without a catalog, so the payload is only read in here
+    try:
+        fileName = data["name"]
+        rigid = data['order']['hasRigidFrame']
+        wireframe = data["wireframe"]
+        model = data['order']['catalog']['name']
+        starterPath, folderPath, fileNameFormatted = starterFile(fileName, rigid, model)
+        fingerprint = FitIndex.FitIndex.fingerprint(data['order']['id'], starterPath[-1], wireframe)
+        docData, fitted = findCopy(fingerprint)
+    except Exception as e:
+        app.log(f"Import failed for file {fileLabel}")
+        return f"{fileLabel} failed to import: {e}"
+
+    if not fitted:
+        try:
+            with report.span("parseStl"):
+                meshName, coordinates, normalVectors = loadMesh(file, data, headers)
+        except Exception as e:
+            app.log(f"Import failed for file {fileLabel}")
+            return f"{fileLabel} failed to import: {e}"
+
+        #Nothing to reuse, the order starts from the local starter template instead of a cloud copy
+        if docData is None and api.templateCache:
+            return importFromTemplate(file, fileLabel, data, fingerprint, (meshName, coordinates, normalVectors))
+
+    # Create a new Fusion file
+    try:
+        if docData is None:
+            with report.span("file_copy"):
+                docData = file_copy(fileName, rigid, model)
+            fitIndex.record(fingerprint, docData.id, fileNameFormatted, False)
+        else:
+            report.count("fitIndex.reused")
+            app.log(f"Reusing {docData.name} for file {fileLabel}, copied by an earlier run")
+        # File creation was successful. Remove from the list of builder files
+        app.log(f"Import successful. Removing data for file {fileLabel}")
+        with report.span("delete"):
+            api.post(f"/api/fusionFile/{file['id']}/delete", {})
+        report.count("apiCalls")
+    except Exception as e:
+        app.log(f"Import failed for file {fileLabel}")
+        return f"{fileLabel} failed to import: {e}"
+    #ui.messageBox(model)
+    #docData = file_copy(fileName, rigid, model)
+
+    if fitted:
+        return f"{fileLabel} already imported and fit as {docData.name}"
+    
+    if model == "KAFO - Custom":
+        kafo = True
+    else:
+        kafo = False
+
+    try:
+        with report.span("fitFrame"):
+            fitFrame(docData, wireframe, kafo, (meshName, coordinates, normalVectors), fingerprint)
+        fitIndex.record(fingerprint, docData.id, fileNameFormatted, True)
+    except Exception as e:
+        app.log(f"Fit failed for file {fileLabel}")
+        return f"{fileLabel} imported, fit failed: {e}"
+
+    return f"{fileLabel} imported and fit"
+
+def loadMesh(file, data, headers=None):
+    #Parsed mesh for a builder file. A cached payload only carries the key of its parsed mesh, and
+    #a freshly downloaded one is parsed once and cached, along with the ETag and Last-Modified in
+    #headers, so the next run can skip the download too
+    mesh = data["mesh"]
+    key = mesh["key"] if "key" in mesh else cache.meshKey(mesh["data"])
+
+    parsed = cache.getMesh(key)
+    if parsed is None:
+        if "data" not in mesh:
+            raise Exception(f"Cached mesh for file {file['name']} ({file['id']}) is missing")
+        #Big ascii meshes can be split across worker processes, small ones still parse serially
+        if api.parseWorkers:
+            parsed = parseStlParallel(mesh["data"], api.parseWorkers)
+        else:
+            parsed = parseStl(mesh["data"])
+        cache.putMesh(key, *parsed)
+
+    if "data" in mesh:
+        cache.putPayload(file['id'], cache.version(file), data, key, headers)
 
-        traveler_orderID   = data['order']['id']
-
-        if str(traveler_orderID) == orderID:
-            fileName = data["name"]
-            meshData = data["mesh"]["data"]
-            meshName, coordinates, normalVectors = parseStl(meshData)
-            rigid = data['order']['hasRigidFrame']
-            model = data['order']['catalog']['name']
-            wireframe = data["wireframe"]
-            model = data['order']['catalog']['name']
-            # Create a new Fusion file
-            try:
-                # Check to make sure order is open
-                if order["status"] == "Open":
-                    docData = file_copy(fileName, rigid, model)
-                    # File creation was successful. Remove from the list of builder files
-                    app.log(f"Import successful. Removing data for file {fileLabel}")
-                    api.post(f"/api/fusionFile/{file['id']}/delete", {})
-            except:
-                app.log(f"Import failed for file {fileLabel}")
-            #ui.messageBox(model)
-            #docData = file_copy(fileName, rigid, model)
-            
-            if model == "KAFO - Custom":
-                kafo = True
-            else:
-                kafo = False
-
-            fitFrame(docData, wireframe, kafo)
-
-
-def pointCreator(wireframe):
-        nodes = []
-        #I'm naming these based on the cross sections they match up with. fitPt1 = CS-1 etc
-        fitPt1 = wireframe["leftHingePos"]
-        fitPt13 = wireframe['rightHingePos']
-        fitPt19 = wireframe["botCuffPos"]
-        fitPt20 = wireframe['botLeftCuffPos']
-        fitPt22 = wireframe['botLeftFramePos']
-        fitPt21 = wireframe['botLeftPos']
-        fitPt18 = wireframe['botRightCuffPos']
-        fitPt16 = wireframe['botRightFramePos']
-        fitPt17 = wireframe['botRightPos']
-        fitPt7 = wireframe['topCuffPos']
-        fitPt6 = wireframe['topLeftCuffPos']
-        fitPt4 = wireframe["topLeftFramePos"]
-        fitPt5 = wireframe['topLeftPos']
-        fitPt8 = wireframe["topRightCuffPos"]
-        fitPt10 = wireframe['topRightFramePos']
-        fitPt9 = wireframe['topRightPos']
-        nodes.extend((fitPt1,fitPt1,fitPt1,fitPt4,fitPt5,fitPt6,fitPt7,fitPt8,fitPt9,fitPt10,fitPt13,fitPt13,fitPt13,fitPt13,fitPt13,fitPt16,fitPt17,fitPt18,fitPt19,fitPt20,fitPt21,fitPt22, fitPt1, fitPt1))
-
-        return nodes
-
-def ip_mover(i,transform, bip=False):
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    design = app.activeProduct
-    root = design.rootComponent
+    return parsed
+
+def ip_mover(handles, i,transform, bip=False, moveRail=True):
 #function to move all IPs and BIPs with their CSs
 
     skList = []
     if bip:
-        skList.append(root.sketches.itemByName('BIP-' + str(i)))
+        skList.append(handles.sketch('BIP-' + str(i)))
     else:
-        skList.append(root.sketches.itemByName('IP-' + str(i)))
+        skList.append(handles.sketch('IP-' + str(i)))
     
     if i == 5:
-        skList.append(root.sketches.itemByName('IP-4.5'))
-        skList.append(root.sketches.itemByName('IP-5.5'))
+        skList.append(handles.sketch('IP-4.5'))
+        skList.append(handles.sketch('IP-5.5'))
 
     for sk in skList:
         group = adsk.core.ObjectCollection.create()
@@ -311,50 +394,51 @@ def ip_mover(i,transform, bip=False):
 
         sk.move(group, transform) 
 
-    if not bip:
-        railSk = root.sketches.itemByName('Pipe-rail-1')
+    if not bip and moveRail:
+        railSk = handles.sketch('Pipe-rail-1')
         railGrp = adsk.core.ObjectCollection.create()
-        if 1 <= i <= 4:
-            railPt = railSk.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(i-1)
-        elif i == 5:
-            railPt = railSk.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(i-1)
-            railPt2 = railSk.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(i)
-            railPt3 = railSk.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(i+1)
-            railGrp.add(railPt2)
-            railGrp.add(railPt3)
-        else:
-            railPt = railSk.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(i+1)
-        railGrp.add(railPt)
+        for railPt in Fitting.pipeRailPoints(i):
+            railGrp.add(handles.fitPoint('Pipe-rail-1', railPt))
 
         railSk.move(railGrp, transform)
     
-def spline_mover(i, transform):
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    design = app.activeProduct
-    root = design.rootComponent
-    splineList = ['rail-1', 'rail-2', 'rail-3', 'rail-4', 'rail-5']
-
-    for spline in splineList:
+def spline_mover(handles, i, transform):
+    for spline in Fitting.RAILS:
         #function to move a specific spline point i, from the spline inputted
-        sk = root.sketches.itemByName(spline)
+        sk = handles.sketch(spline)
 
         group = adsk.core.ObjectCollection.create()
         #add all sketch components to group
-        spoint = sk.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(i)
+        spoint = handles.fitPoint(spline, i)
         group.add(spoint)
 
         sk.move(group, transform)
 
-def hinge_mover(transform, medial=False):
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    design = app.activeProduct
-    root = design.rootComponent
+def rail_mover(handles, railMoves):
+    #Makes all of a transform plan's rail moves (see Fitting.planRailMoves) with each rail sketch's
+    #compute deferred, so every rail recomputes once instead of after each of its fit point moves
+    for name, moves in railMoves.items():
+        sk = handles.sketch(name)
+        wasDeferred = sk.isComputeDeferred
+        sk.isComputeDeferred = True
+        try:
+            for translation, points in moves:
+                group = adsk.core.ObjectCollection.create()
+                for point in points:
+                    group.add(handles.fitPoint(name, point))
+
+                transform = adsk.core.Matrix3D.create()
+                transform.translation = adsk.core.Vector3D.create(*translation)
+                sk.move(group, transform)
+        finally:
+            #Left deferred if fitFrame already deferred it, see Compute.DeferredCompute
+            sk.isComputeDeferred = wasDeferred
+
+def hinge_mover(handles, transform, medial=False):
     if medial:
-        occ = root.occurrences.itemByName('MedialHinge:1')
+        occ = handles.occurrence('MedialHinge:1')
     else:
-        occ = root.occurrences.itemByName('LateralHinge:1')
+        occ = handles.occurrence('LateralHinge:1')
     features = occ.component.features
     moveFeats = features.moveFeatures
 
@@ -365,94 +449,66 @@ def hinge_mover(transform, medial=False):
     moveFeatureInput = moveFeats.createInput(bodies, transform)
     moveFeats.add(moveFeatureInput)   
 
-def csMover(i, fitPts):
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    design = app.activeProduct
-    root = design.rootComponent
-
+def saveStarterAnchors(path=None):
+    #Reads the anchors of both Ascender starter files and writes them as the --anchors JSON that
+    #Fitting.py plans batches from without Fusion. Returns the path written. Runs instead of the
+    #import when saveAnchors is on in config2.json
+    path = Path(path) if path is not None else (Path(__file__).parent / "starterAnchors.json").resolve()
+    anchors = {}
+    for name in ("A3_Base_File", "A3_Rigid_Base_File"):
+        doc = app.documents.open(folderIndex.file("Ascender Fitment Starters", name), False)
+        try:
+            des = doc.products.itemByProductType('DesignProductType')
+            anchors[name] = Fitting.anchorsJson(readAnchors(Handles.DocumentHandles(des.rootComponent)))
+        finally:
+            doc.close(False)
+
+    with open(path, "w") as f:
+        json.dump(anchors, f, indent=2)
+    return path
+
+def readAnchors(handles):
+    #inside point of each cross section the transform plan is worked out from, read before anything moves
+    anchors = {}
+    for i in Fitting.ANCHORS:
+        pt = handles.fitPoint('CS-'+ str(i), 1).worldGeometry
+        anchors[i] = (pt.x, pt.y, pt.z)
+    return anchors
+
+def csMover(handles, i, translation, moveRails=True):
     #add cross section curve and points to group and move together
     group = adsk.core.ObjectCollection.create()
     #Grab sketch based on i
-    cs = root.sketches.itemByName('CS-'+ str(i))
+    cs = handles.sketch('CS-'+ str(i))
     #add all sketch components to group
     for crv in cs.sketchCurves:
         group.add(crv)
     for pnt in cs.sketchPoints:
         group.add(pnt)
 
-    #find inside point on CS as our fromPt
-    csPt = cs.sketchCurves.sketchFittedSplines.item(0).fitPoints.item(1).worldGeometry
-
-    cs1Pt = root.sketches.itemByName('CS-1').sketchCurves.sketchFittedSplines.item(0).fitPoints.item(1).worldGeometry
-    cs13Pt = root.sketches.itemByName('CS-13').sketchCurves.sketchFittedSplines.item(0).fitPoints.item(1).worldGeometry
-    cs10Pt = root.sketches.itemByName('CS-10').sketchCurves.sketchFittedSplines.item(0).fitPoints.item(1).worldGeometry
-
-    fitPt = fitPts[i-1]
-    fitPt10 = fitPts[9]
-
-
-
-    if 2<= i <= 3 or 23 <= i <= 24:
-        fromPt = cs1Pt
-    elif 11 <= i <= 12 or 14 <= i <= 15:
-        fromPt = cs13Pt
-    else:
-        fromPt = csPt
-
-    rawTransform = adsk.core.Matrix3D.create()
-    rawTransform.translation = fromPt.vectorTo(fitPt)
-
-    dX = rawTransform.translation.x
-    dY = rawTransform.translation.y
-    dZ = rawTransform.translation.z
-
-    vector10 = cs10Pt.vectorTo(fitPt10)
-    zShift = vector10.z
-
-    #specific translation modifiers for cs's
+    #translation comes from the transform plan, see Fitting.planTransforms
     transform = adsk.core.Matrix3D.create()
-
-    if 1<=i<=3 or 23<=i<=24:
-        a = 0.92
-    elif 11<=i<=15:
-        a = -0.92
-    else:
-        a = 0
-
-    #isolating cuff cross sections to move in X and Y directions
-    if 4 <= i <= 10:
-        if 6 <= i <= 8:
-            transform.translation = adsk.core.Vector3D.create(dX, dY, zShift)
-        else:
-            transform.translation = adsk.core.Vector3D.create(dX, 0, zShift) 
-    elif 18 <= i <= 20:                                                                                  #BCuff corners flare out
-        transform.translation = adsk.core.Vector3D.create(dX, dY, 0)
-    else:
-        transform.translation = adsk.core.Vector3D.create(dX+a, 0, 0)
+    transform.translation = adsk.core.Vector3D.create(*translation)
 
     if i == 1:
-        hinge_mover(transform, False)
+        hinge_mover(handles, transform, False)
     elif i == 13:
-        hinge_mover(transform, True)
+        hinge_mover(handles, transform, True)
         
     cs.move(group, transform)
-    spline_mover(i-1, transform)
+    #with moveRails off the rails are left to rail_mover
+    if moveRails:
+        spline_mover(handles, i-1, transform)
     if 1 <= i <= 13:
-        ip_mover(i, transform)
+        ip_mover(handles, i, transform, moveRail=moveRails)
     elif i == 14 or i == 24:
-        ip_mover(i, transform, True)
-
-def shorten_frame(zShift):
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    design = app.activeProduct
-    root = design.rootComponent
+        ip_mover(handles, i, transform, True)
 
+def shorten_frame(handles, zShift):
     #add cross section curve and points to group and move together
     group = adsk.core.ObjectCollection.create()
 
-    sk = root.sketches.itemByName('Strap pos')
+    sk = handles.sketch('Strap pos')
 
     for line in sk.sketchCurves.sketchLines:
         if line.startSketchPoint.worldGeometry.z > 11:
@@ -470,86 +526,110 @@ def shorten_frame(zShift):
 
 #         doc.save('Wireframe fit')
 
-def fitFrame(docData, wireframe, kafo):
-        doc = app.documents.open(docData, False)
+def addMeshBody(component, parsed):
+    #Adds parseStl's result as a mesh body, moved onto the frame. Call inside a base feature edit
+    if api.indexMesh:
+        return addIndexedMesh(component, parsed)
+    meshName, coordinates, normalVectors = parsed
+    return component.meshBodies.addByTriangleMeshData(Fitting.meshCoordinates(coordinates), [], Fitting.meshNormals(normalVectors), [])
+
+def addIndexedMesh(component, parsed):
+    #Adds parseStl's result as a mesh body with one normal per shared vertex
+    meshName, coordinates, normalVectors = parsed
+    with report.span("indexMesh"):
+        mesh = IndexedMesh.indexMesh(coordinates, normalVectors, api.meshTolerance)
+    report.count("mesh.soupVertices", mesh.soupVertices)
+    report.count("mesh.vertices", mesh.vertexCount)
+    app.log(f"Mesh {meshName}: {mesh.vertexCount} vertices for {mesh.soupVertices} ({mesh.dedupRatio:.1f}x) in {mesh.seconds:.3f}s")
+
+    #Scans come in far denser than fitting needs and keep Fusion sluggish for the whole session
+    if api.meshBudget and mesh.triangleCount > api.meshBudget:
+        with report.span("decimate"):
+            mesh = IndexedMesh.decimate(mesh, api.meshBudget, api.meshMaxDeviation)
+        if mesh.sourceTriangles is not None:
+            report.count("mesh.trianglesRemoved", mesh.sourceTriangles - mesh.triangleCount)
+            app.log(f"Mesh {meshName}: decimated {mesh.sourceTriangles} triangles to {mesh.triangleCount}, vertices moved up to {mesh.maxError:.3f}mm (mean {mesh.meanError:.3f}mm)")
+
+    triangles = mesh.triangles.tolist()
+    return component.meshBodies.addByTriangleMeshData(Fitting.meshCoordinates(mesh.vertices), triangles, mesh.normals.tolist(), triangles)
+
+def fitFrame(docData, wireframe, kafo, mesh=None, fingerprint=None, doc=None, saveAs=None):
+        #doc is a document that's already open, like one imported from a starter template, and is fit
+        #in place of opening docData. saveAs (folder, name) saves the fit there as a new file
+        if doc is None:
+            with report.span("documents.open"):
+                doc = app.documents.open(docData, False)
         des: adsk.fusion.Design = doc.products.itemByProductType('DesignProductType')
         root = des.rootComponent
+        #Sketches and hinges of the document we just opened, not whichever one happens to be active
+        handles = Handles.DocumentHandles(root)
 
-        if not kafo:
-            nodes = pointCreator(wireframe)
-
-            sk = root.sketches.add(root.xYConstructionPlane)
-
-            fitPts = []
-            for node in nodes:
-                pt = adsk.core.Point3D.create(node[0]/10,(node[2]/10) + 8.38,node[1]/10)
-                sk.sketchPoints.add(pt)
-                fitPts.append(pt)
-
-            if fitPts[9].z < 10.668:
-                shorten = True
-                zShift = fitPts[9].z - 10.668
-                shorten_frame(zShift)
+        #The whole fit recomputes once at the end of this block rather than after every move
+        with Compute.DeferredCompute(des, api.deferCompute) as compute:
+            if not kafo:
+                #Read where the cross sections are once and work out every move, then make them
+                with report.span("readAnchors"):
+                    anchors = readAnchors(handles)
+                plan = Fitting.fitPlan(wireframe, anchors)
 
+                sk = root.sketches.add(root.xYConstructionPlane)
 
-            leftHinge = [2,3,23,24,1]
-            rightHinge = [11,12,14,15,13]
+                for fitPt in plan["fitPoints"]:
+                    sk.sketchPoints.add(adsk.core.Point3D.create(*fitPt))
 
+                if plan["shorten"] is not None:
+                    with report.span("shorten_frame"):
+                        shorten_frame(handles, plan["shorten"])
 
-            for n in leftHinge:
-                csMover(n, fitPts)
+                for i, translation in plan["transforms"]:
+                    with report.span("csMover"):
+                        csMover(handles, i, translation, not api.batchRailMoves)
 
-            for x in rightHinge:
-                csMover(x, fitPts)
+                #Rail fit points all move at the end, one recompute per rail
+                if api.batchRailMoves:
+                    with report.span("rail_mover"):
+                        rail_mover(handles, plan["railMoves"])
 
-            for i in range(4, 11):
-                csMover(i, fitPts)
-            for i in range(16, 23):
-                csMover(i, fitPts)
+                sk.isLightBulbOn = False
 
-            sk.isLightBulbOn = False
+        if compute.mode is not None:
+            report.count(f"deferredCompute.{compute.mode}")
 
-        doc.save('Wireframe fit')
+        #The leg mesh we already downloaded and parsed, so nobody has to pick its .stl again
+        if mesh is not None:
+            with report.span("importMesh"):
+                importMesh(mesh, root)
 
-        # meshBodies = root.meshBodies
-        # leg = meshBodies.addByTriangleMeshData(coordinates, [], normalVectors, [])
+        #So the fitted file can be matched back to the order, starter and wireframe, see FitIndex
+        if fingerprint is not None:
+            des.attributes.add(FitIndex.ATTRIBUTE_GROUP, FitIndex.ATTRIBUTE_NAME, fingerprint)
 
-def importMesh():
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    design = app.activeProduct
-    root = design.rootComponent
-    meshBodies = root.meshBodies
-    moveFeats = root.features.moveFeatures
+        with report.span("doc.save"):
+            if saveAs is None:
+                doc.save('Wireframe fit')
+            elif not doc.saveAs(saveAs[1], saveAs[0], 'Wireframe fit', ''):
+                raise Exception(f"Could not save {saveAs[1]} into {saveAs[0].name}")
 
-    
-
-    unitMm = adsk.fusion.MeshUnits.MillimeterMeshUnit
+def importMesh(parsed=None, component=None):
+    #Adds the leg mesh to component, the active design's root by default. Vertices are moved back by
+    #Fitting.FRAME_OFFSET as they go in, so there is no move feature to recompute afterwards. parsed
+    #is parseStl's result for the builder mesh, without it the operator picks .stl files
+    if component is None:
+        component = adsk.core.Application.get().activeProduct.rootComponent
 
-    baseFeatures = root.features.baseFeatures
-    baseFeature = baseFeatures.add()
+    meshes = [parsed] if parsed is not None else [parseStlFile(path) for path in selectFiles('Select leg STL') or []]
 
+    baseFeature = component.features.baseFeatures.add()
     baseFeature.startEdit()
 
-    paths = selectFiles('Select leg STL')
-
-    for path in paths:
-        mesh = meshBodies.add(path, unitMm, baseFeature)
-
-    baseFeature.finishEdit()
-
-
-    meshColl = adsk.core.ObjectCollection.create()
-    meshColl.add(meshBodies.item(0))
-
-    transform = adsk.core.Matrix3D.create()
-    transform.translation = adsk.core.Vector3D.create(0, 8.38, 0)
-
-    moveInput = moveFeats.createInput(meshColl, transform)
-
-    moveFeats.add(moveInput)
+    bodies = []
+    try:
+        for mesh in meshes:
+            bodies.append(addMeshBody(component, mesh))
+    finally:
+        baseFeature.finishEdit()
 
-    
+    return bodies
 
 def selectFiles(
     msg :str):
@@ -564,9 +644,25 @@ def selectFiles(
         return fileDlg.filenames
 
 def execute():
-    importFiles()
-    importMesh()
-
-
-execute()
+    report.start()
+    try:
+        importFiles()
+    finally:
+        #Keep what we learned about which file belongs to which order, even if the run failed
+        orderIndex.save()
+        cache.save()
+        listingCache.save()
+        fitIndex.save()
+        templateCache.save()
+        app.log(f"Builder file cache: {cache.stats()}")
+        app.log(f"Run report written to {report.write(api=api.stats(), cache=cache.stats(), listing=listingCache.stats(), templates=templateCache.stats())}")
+        #Close the pooled keep-alive connections so they don't linger in Fusion's process
+        api.close()
+
+
+#With saveAnchors on the script only writes the starter files' anchors for Fitting.py
+if api.saveAnchors:
+    app.log(f"Starter file anchors written to {saveStarterAnchors()}")
+else:
+    execute()
 #importMesh()
\ No newline at end of file
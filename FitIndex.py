@@ -0,0 +1,47 @@
+import hashlib
+import json
+#Part of the script's package inside Fusion, but also imported on its own by the benchmarks
+try:
+    from .JsonIndex import JsonIndex
+except ImportError:
+    from JsonIndex import JsonIndex
+
+#Where fitFrame writes the fingerprint on the fitted design, so a fitted file can be traced back to
+#the order, starter file and wireframe it was made from
+ATTRIBUTE_GROUP = "FileCreator"
+ATTRIBUTE_NAME = "fitFingerprint"
+
+class FitIndex(JsonIndex):
+
+    # Remembers the Fusion file each builder file was copied into, keyed by a fingerprint of what
+    # decides the fit: the order, the starter file and the wireframe. A rerun with the same
+    # fingerprint reuses that file instead of copying the starter into the patient folder again, and
+    # once it has been fit and saved skips the fit as well. A changed wireframe is a new fingerprint,
+    # so it gets a fresh copy and fit like before
+
+    defaultPath = "fitIndex.json"
+
+    @staticmethod
+    def fingerprint(orderId, starter, wireframe):
+        # starter is the starter file's name. Key order and number formatting in the wireframe don't
+        # change the hash, the values do
+        wireframeHash = hashlib.sha256(json.dumps(wireframe, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+        key = json.dumps({"order": str(orderId), "starter": starter, "wireframe": wireframeHash}, sort_keys=True)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, fingerprint):
+        # {"fileId": <Fusion data file id>, "name": ..., "fitted": bool} or None
+        with self.lock:
+            return self.entries.get(fingerprint)
+
+    def record(self, fingerprint, fileId, name, fitted):
+        with self.lock:
+            entry = {"fileId": fileId, "name": name, "fitted": fitted}
+            if self.entries.get(fingerprint) != entry:
+                self.entries[fingerprint] = entry
+                self.dirty = True
+
+    def forget(self, fingerprint):
+        with self.lock:
+            if self.entries.pop(fingerprint, None) is not None:
+                self.dirty = True
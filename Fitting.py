@@ -0,0 +1,217 @@
+#Works out everything fitFrame does to a starter file, as plain numbers so it can be checked without
+#Fusion. Points are (x, y, z) tuples in Fusion's centimeters. Run with --dry-run to write the plans
+#for a batch of saved builder files as JSON without touching Fusion, see main()
+import argparse
+import json
+import sys
+from pathlib import Path
+
+#The frame sits this far back from the wireframe's origin in the starter files
+FRAME_OFFSET = 8.38
+#Frames whose CS-10 fit point is lower than this get their straps moved down, see shorten_frame
+SHORTEN_HEIGHT = 10.668
+
+#The order fitFrame moves the cross sections in: the hinge ends first, then the cuffs
+MOVE_ORDER = [2, 3, 23, 24, 1, 11, 12, 14, 15, 13] + list(range(4, 11)) + list(range(16, 23))
+
+def fromAnchor(i):
+    #The cross section whose inside point CS-i is moved from. The ones around a hinge move with it
+    if 2 <= i <= 3 or 23 <= i <= 24:
+        return 1
+    elif 11 <= i <= 12 or 14 <= i <= 15:
+        return 13
+    return i
+
+#Cross sections whose inside point the plan needs. CS-10 also sets the cuff height
+ANCHORS = sorted({fromAnchor(i) for i in MOVE_ORDER} | {10})
+
+def pointCreator(wireframe):
+        nodes = []
+        #I'm naming these based on the cross sections they match up with. fitPt1 = CS-1 etc
+        fitPt1 = wireframe["leftHingePos"]
+        fitPt13 = wireframe['rightHingePos']
+        fitPt19 = wireframe["botCuffPos"]
+        fitPt20 = wireframe['botLeftCuffPos']
+        fitPt22 = wireframe['botLeftFramePos']
+        fitPt21 = wireframe['botLeftPos']
+        fitPt18 = wireframe['botRightCuffPos']
+        fitPt16 = wireframe['botRightFramePos']
+        fitPt17 = wireframe['botRightPos']
+        fitPt7 = wireframe['topCuffPos']
+        fitPt6 = wireframe['topLeftCuffPos']
+        fitPt4 = wireframe["topLeftFramePos"]
+        fitPt5 = wireframe['topLeftPos']
+        fitPt8 = wireframe["topRightCuffPos"]
+        fitPt10 = wireframe['topRightFramePos']
+        fitPt9 = wireframe['topRightPos']
+        nodes.extend((fitPt1,fitPt1,fitPt1,fitPt4,fitPt5,fitPt6,fitPt7,fitPt8,fitPt9,fitPt10,fitPt13,fitPt13,fitPt13,fitPt13,fitPt13,fitPt16,fitPt17,fitPt18,fitPt19,fitPt20,fitPt21,fitPt22, fitPt1, fitPt1))
+
+        return nodes
+
+def fitPoint(node):
+    #Wireframe nodes are millimeters with y up, Fusion is centimeters with z up and the frame sits back
+    return (node[0]/10, (node[2]/10) + FRAME_OFFSET, node[1]/10)
+
+def meshCoordinates(coordinates):
+    #parseStl's millimeter coordinates as the flat list of centimeters Fusion takes, already moved
+    #back by FRAME_OFFSET along y to sit on the frame. Takes numpy arrays or array('f')
+    if hasattr(coordinates, "reshape"):
+        points = coordinates.reshape(-1, 3).astype(float) / 10
+        points[:, 1] += FRAME_OFFSET
+        return points.ravel().tolist()
+    return [c / 10 + FRAME_OFFSET if i % 3 == 1 else c / 10 for i, c in enumerate(coordinates)]
+
+def meshNormals(normalVectors):
+    #parseStl's one normal per facet as the one normal per vertex addByTriangleMeshData takes when
+    #there's no normal index list. Takes numpy arrays or array('f')
+    if hasattr(normalVectors, "reshape"):
+        return normalVectors.reshape(-1, 3).repeat(3, axis=0).ravel().tolist()
+    return [n for i in range(0, len(normalVectors), 3) for _ in range(3) for n in normalVectors[i:i + 3]]
+
+def csTranslation(i, anchors, fitPts):
+    fromPt = anchors[fromAnchor(i)]
+    fitPt = fitPts[i-1]
+
+    dX = fitPt[0] - fromPt[0]
+    dY = fitPt[1] - fromPt[1]
+
+    zShift = fitPts[9][2] - anchors[10][2]
+
+    #specific translation modifiers for cs's
+    if 1<=i<=3 or 23<=i<=24:
+        a = 0.92
+    elif 11<=i<=15:
+        a = -0.92
+    else:
+        a = 0
+
+    #isolating cuff cross sections to move in X and Y directions
+    if 4 <= i <= 10:
+        if 6 <= i <= 8:
+            return (dX, dY, zShift)
+        else:
+            return (dX, 0, zShift)
+    elif 18 <= i <= 20:                                                                                  #BCuff corners flare out
+        return (dX, dY, 0)
+    else:
+        return (dX+a, 0, 0)
+
+def planTransforms(anchors, fitPts):
+    #Translation for every cross section, in MOVE_ORDER. anchors maps each cross section in ANCHORS to
+    #its inside point before anything moves. That is also what the moves used to read one at a time:
+    #each cross section only moves itself, and CS-1, CS-13 and CS-10 only move after the last move
+    #that reads them
+    return [(i, csTranslation(i, anchors, fitPts)) for i in MOVE_ORDER]
+
+RAILS = ['rail-1', 'rail-2', 'rail-3', 'rail-4', 'rail-5']
+
+def pipeRailPoints(i):
+    #Fit points on Pipe-rail-1 that move with IP-i. IP-5 also carries IP-4.5 and IP-5.5
+    if 1 <= i <= 4:
+        return [i-1]
+    elif i == 5:
+        return [i-1, i, i+1]
+    return [i+1]
+
+def planRailMoves(plan):
+    #The rail fit point moves of a transform plan, grouped per rail sketch so each sketch can take all
+    #of its moves in one go: {sketch name: [(translation, [fit point index, ...]), ...]}. Fit point i-1
+    #of every rail moves with CS-i, and Pipe-rail-1 moves with the IPs
+    railMoves = {name: [] for name in RAILS}
+    railMoves['Pipe-rail-1'] = []
+    for i, translation in plan:
+        for name in RAILS:
+            railMoves[name].append((translation, [i-1]))
+        if 1 <= i <= 13:
+            railMoves['Pipe-rail-1'].append((translation, pipeRailPoints(i)))
+    return railMoves
+
+def fitPlan(wireframe, anchors):
+    #Everything fitFrame does to a starter file for this wireframe, given the starter's anchors (see
+    #planTransforms):
+    #  fitPoints   the 24 fit points fitFrame sketches, one per cross section
+    #  shorten     how far shorten_frame moves the straps, or None when the frame is tall enough
+    #  transforms  [(i, translation), ...] for each cross section in the order csMover moves them
+    #  hinges      translation of each hinge occurrence, which moves with CS-1 and CS-13
+    #  railMoves   the rail fit point moves, see planRailMoves
+    fitPts = [fitPoint(node) for node in pointCreator(wireframe)]
+
+    shorten = None
+    if fitPts[9][2] < SHORTEN_HEIGHT:
+        shorten = fitPts[9][2] - SHORTEN_HEIGHT
+
+    transforms = planTransforms(anchors, fitPts)
+    byIndex = dict(transforms)
+
+    return {
+        "fitPoints": fitPts,
+        "shorten": shorten,
+        "transforms": transforms,
+        "hinges": {"LateralHinge:1": byIndex[1], "MedialHinge:1": byIndex[13]},
+        "railMoves": planRailMoves(transforms)
+    }
+
+def readBuilderFiles(paths):
+    #Builder file payloads from JSON files holding one payload or a list of them, or from folders of
+    #those files, like the mesh cache's file-<id>.json
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, "r") as f:
+                data = json.load(f)
+            for payload in data if isinstance(data, list) else [data]:
+                if isinstance(payload, dict) and "wireframe" in payload:
+                    yield payload
+
+def starterAnchors(anchors, order):
+    #anchors is either one set of cross section anchors for every order, or a set per starter file
+    #name. Keys are cross section numbers as strings, like JSON leaves them
+    if "1" not in anchors:
+        anchors = anchors["A3_Rigid_Base_File" if order.get("hasRigidFrame") else "A3_Base_File"]
+    return {int(i): tuple(point) for i, point in anchors.items()}
+
+def anchorsJson(anchors):
+    #One starter's anchors, as read by File_Creator's readAnchors, in the form starterAnchors takes
+    return {str(i): list(point) for i, point in sorted(anchors.items())}
+
+def dryRun(payloads, anchors):
+    #Fit plan for each builder file without Fusion. KAFO files aren't fit, the same as in fitFrame
+    plans = []
+    for payload in payloads:
+        order = payload.get("order") or {}
+        kafo = (order.get("catalog") or {}).get("name") == "KAFO - Custom"
+        entry = {"fileId": payload.get("id"), "name": payload.get("name"), "orderId": order.get("id"), "kafo": kafo}
+        try:
+            entry["plan"] = None if kafo else fitPlan(payload["wireframe"], starterAnchors(anchors, order))
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+        plans.append(entry)
+    return plans
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Work out fitFrame's transform plans without Fusion")
+    #Planning is all the command line does, so the flag is optional. It stays as the documented way in
+    parser.add_argument("--dry-run", action="store_true", help="write transform plans instead of fitting, the default")
+    parser.add_argument("--anchors", required=True, help="JSON of the starter files' cross section anchors")
+    parser.add_argument("--output", default="-", help="where to write the plans, - for stdout")
+    parser.add_argument("builderFiles", nargs="+", help="builder file JSON files or folders of them")
+    args = parser.parse_args(argv)
+
+    with open(args.anchors, "r") as f:
+        anchors = json.load(f)
+
+    plans = dryRun(readBuilderFiles(args.builderFiles), anchors)
+
+    #No indent, json's C encoder only handles compact output and an indented batch takes minutes
+    if args.output == "-":
+        sys.stdout.write(json.dumps(plans))
+    else:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(plans))
+
+    failed = sum("error" in plan for plan in plans)
+    print(f"{len(plans)} plans, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
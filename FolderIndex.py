@@ -0,0 +1,68 @@
+import threading
+import time
+
+class FolderIndex:
+
+    # Name lookups into a Fusion data folder tree. Listing a folder's dataFolders or dataFiles is a
+    # cloud round trip, so each folder is listed once into a name -> item dict and then reused for the
+    # rest of the session. A name that isn't in the dict lists that folder again before giving up,
+    # which picks up things like a new month folder. With a ttl, listings older than ttl seconds are
+    # refreshed on their next use. Only needs .name, .id, .dataFolders and .dataFiles from the items
+
+    root = None
+    ttl = None
+    listings = 0
+
+    def __init__(self, getRoot, ttl=None):
+        # getRoot is called the first time the index is used, e.g. lambda: app.data.findFolderById(id)
+        self.getRoot = getRoot
+        self.ttl = ttl
+        self.folders = {}
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def folder(self, *path):
+        # folder("KAFO", "KAFO Starter Files") is the KAFO Starter Files folder inside KAFO
+        with self.lock:
+            folder = self.rootFolder()
+            for name in path:
+                folder = self.lookup(self.folders, folder, "dataFolders", name)
+            return folder
+
+    def file(self, *path):
+        # file("Ascender Fitment Starters", "A3_Base_File") is the starter file in that folder
+        folder = self.folder(*path[:-1])
+        with self.lock:
+            return self.lookup(self.files, folder, "dataFiles", path[-1])
+
+    def invalidate(self):
+        with self.lock:
+            self.root = None
+            self.folders.clear()
+            self.files.clear()
+
+    def rootFolder(self):
+        if self.root is None:
+            self.root = self.getRoot()
+            if self.root is None:
+                raise Exception("Could not find the root data folder")
+        return self.root
+
+    def lookup(self, listings, folder, collection, name):
+        listing = listings.get(folder.id)
+        if listing is not None and self.ttl is not None and time.monotonic() - listing[0] > self.ttl:
+            listing = None
+
+        if listing is None or name not in listing[1]:
+            listing = self.list(folder, collection)
+            listings[folder.id] = listing
+
+        item = listing[1].get(name)
+        if item is None:
+            raise Exception(f"Could not find '{name}' in folder '{folder.name}'")
+        return item
+
+    def list(self, folder, collection):
+        # Later items win on duplicate names, the same as the loops this replaced
+        self.listings += 1
+        return time.monotonic(), {item.name: item for item in getattr(folder, collection)}
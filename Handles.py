@@ -0,0 +1,42 @@
+class DocumentHandles:
+
+    # Named sketches, their fitted splines and fit points, and occurrences of one document's root
+    # component, each looked up once and handed out again after that. Make a new one for each document
+    # fitFrame opens. A handle Fusion reports as no longer valid (the entity was deleted or the
+    # document closed) is looked up again. lookups counts the calls that went to Fusion
+
+    root = None
+    lookups = 0
+
+    def __init__(self, root):
+        self.root = root
+        self.handles = {}
+
+    def sketch(self, name):
+        return self.get(("sketch", name), lambda: self.root.sketches.itemByName(name))
+
+    def spline(self, name):
+        # The sketch's first fitted spline, which is the only one the starter files have
+        return self.get(("spline", name), lambda: self.sketch(name).sketchCurves.sketchFittedSplines.item(0))
+
+    def fitPoints(self, name):
+        return self.get(("fitPoints", name), lambda: self.spline(name).fitPoints)
+
+    def fitPoint(self, name, i):
+        return self.get(("fitPoint", name, i), lambda: self.fitPoints(name).item(i))
+
+    def occurrence(self, name):
+        return self.get(("occurrence", name), lambda: self.root.occurrences.itemByName(name))
+
+    def get(self, key, lookup):
+        handle = self.handles.get(key)
+        if handle is None or not getattr(handle, "isValid", True):
+            self.lookups += 1
+            handle = lookup()
+            if handle is None:
+                raise Exception(f"Could not find {key[0]} '{key[1]}'")
+            self.handles[key] = handle
+        return handle
+
+    def invalidate(self):
+        self.handles.clear()
@@ -0,0 +1,294 @@
+#Turns parseStl's triangle soup, where every facet carries its own 9 floats, into a shared vertex
+#buffer and a triangle index array, the form addByTriangleMeshData takes with an index list
+#NumPy is not bundled with every Fusion install, so this has a pure-Python fallback like Stl.py
+import math
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class IndexedMesh:
+
+    # vertices holds 3 floats per unique vertex, triangles 3 uint32 vertex indices per facet and
+    # normals 3 floats per vertex: the area weighted average of the facets around it. Numpy arrays
+    # when numpy is installed, array('f') and array('I') otherwise. With a tolerance, vertices that
+    # round to the same multiple of it are merged and facets that collapse because of it are dropped.
+    # soupVertices and seconds are kept so the dedup can be reported. A decimated mesh also has the
+    # triangle count it started from and how far the original vertices moved, in the mesh's units
+
+    vertices = None
+    triangles = None
+    normals = None
+    tolerance = None
+    soupVertices = 0
+    seconds = 0.0
+    sourceTriangles = None
+    maxError = 0.0
+    meanError = 0.0
+
+    def __init__(self, vertices, triangles, normals, tolerance=None, soupVertices=0, seconds=0.0):
+        self.vertices = vertices
+        self.triangles = triangles
+        self.normals = normals
+        self.tolerance = tolerance
+        self.soupVertices = soupVertices
+        self.seconds = seconds
+
+    @property
+    def vertexCount(self):
+        return len(self.vertices) // 3
+
+    @property
+    def triangleCount(self):
+        return len(self.triangles) // 3
+
+    @property
+    def dedupRatio(self):
+        # How many soup vertices each unique vertex stood in for, about 6 for a closed mesh
+        return self.soupVertices / self.vertexCount if self.vertexCount else 0.0
+
+    @property
+    def nbytes(self):
+        return (len(self.vertices) + len(self.normals)) * 4 + len(self.triangles) * 4
+
+    def stats(self):
+        stats = {
+            "soupVertices": self.soupVertices,
+            "vertices": self.vertexCount,
+            "triangles": self.triangleCount,
+            "dedupRatio": round(self.dedupRatio, 3),
+            "seconds": round(self.seconds, 4),
+        }
+        if self.sourceTriangles is not None:
+            stats.update(sourceTriangles=self.sourceTriangles, maxError=self.maxError, meanError=self.meanError)
+        return stats
+
+def indexMesh(coordinates, normalVectors=None, tolerance=None, vectorized=True):
+    #IndexedMesh for parseStl's coordinates. normalVectors are the .stl's facet normals, only used
+    #for vertices whose facets have no area to take a normal from
+    start = time.perf_counter()
+    if vectorized and np is not None:
+        vertices, triangles, normals = indexNumpy(coordinates, normalVectors, tolerance)
+    else:
+        vertices, triangles, normals = indexPython(coordinates, normalVectors, tolerance)
+    return IndexedMesh(vertices, triangles, normals, tolerance, len(coordinates) // 3, time.perf_counter() - start)
+
+#How many clusterings decimate() tries when searching for a cell size, and how full of the budget
+#counts as close enough to stop early
+DECIMATE_PASSES = 8
+BUDGET_FILL = 0.9
+
+def decimate(mesh, budget, maxDeviation=None):
+    #Vertex clustering down to at most budget triangles: vertices are grouped into cubic grid cells
+    #and each cell's vertices become one at their average, with facets that collapse dropped. The cell
+    #size is searched for, starting from the one that leaves about budget triangles on a closed
+    #surface. Since a cell's vertex never leaves its cell, no cell is made bigger than maxDeviation
+    #allows, and a mesh can come back over budget rather than past maxDeviation. Vertices on the
+    #bounding box stay on it. maxError and meanError are how far the original vertices ended up from
+    #their cell's vertex.
+    #Needs numpy; without it, or when already within budget, the mesh comes back as it is
+    if np is None or mesh.triangleCount <= budget:
+        return mesh
+
+    start = time.perf_counter()
+    vertices = np.asarray(mesh.vertices, dtype=np.float32).reshape(-1, 3).astype(np.float64)
+    triangles = np.asarray(mesh.triangles, dtype=np.int64).reshape(-1, 3)
+    low, high = vertices.min(axis=0), vertices.max(axis=0)
+
+    corners = vertices[triangles]
+    area = np.sqrt((np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]) ** 2).sum(axis=1)).sum() / 2
+    corners = None
+
+    # A cell's vertex is somewhere in the cell, so it can't be further than the cell's diagonal away
+    largest = maxDeviation / math.sqrt(3) if maxDeviation else math.inf
+    cell = min(math.sqrt(2 * area / budget) if area else float((high - low).max()) / 2, largest)
+
+    result = over = None
+    lo, hi = 0.0, math.inf
+    for _ in range(DECIMATE_PASSES):
+        clustered = clusterVertices(vertices, triangles, cell, low, high)
+        count = len(clustered[1])
+        if count <= budget:
+            result, hi = clustered, cell
+            if count >= budget * BUDGET_FILL:
+                break
+        else:
+            over, lo = clustered, cell
+            if cell >= largest:
+                break
+
+        # Triangle count goes with one over the cell size squared
+        guess = cell * math.sqrt(count / budget)
+        if not lo < guess < hi:
+            guess = math.sqrt(lo * hi) if lo and hi < math.inf else (hi / 2 if hi < math.inf else lo * 2)
+        cell = min(guess, largest)
+
+    newVertices, newTriangles, moved = result if result is not None else over
+
+    newNormals = vertexNormalsNumpy(newVertices, newTriangles, None)
+    decimated = IndexedMesh(newVertices.astype(np.float32).ravel(), newTriangles.astype(np.uint32).ravel(), newNormals.ravel(),
+                            mesh.tolerance, mesh.soupVertices, mesh.seconds + time.perf_counter() - start)
+    decimated.sourceTriangles = mesh.triangleCount
+    decimated.maxError = float(moved.max())
+    decimated.meanError = float(moved.mean())
+    return decimated
+
+def clusterVertices(vertices, triangles, cell, low, high):
+    #(vertices, triangles, how far each original vertex moved) for one cell size
+    keys = np.floor((vertices - low) / cell).astype(np.int64)
+    cells = keys.max(axis=0) + 1
+    if float(cells[0]) * float(cells[1]) * float(cells[2]) < 2 ** 62:
+        keys = (keys[:, 0] * cells[1] + keys[:, 1]) * cells[2] + keys[:, 2]
+        _, vertexCluster = np.unique(keys, return_inverse=True)
+    else:
+        _, vertexCluster = np.unique(keys, axis=0, return_inverse=True)
+    vertexCluster = vertexCluster.reshape(-1)
+    clusterCount = int(vertexCluster.max()) + 1
+
+    counts = np.bincount(vertexCluster, minlength=clusterCount)
+    centers = np.empty((clusterCount, 3))
+    for axis in range(3):
+        centers[:, axis] = np.bincount(vertexCluster, vertices[:, axis], clusterCount) / counts
+        # Cells holding the mesh's extremes keep them, so the bounding box doesn't shrink
+        for bound in (low, high):
+            centers[vertexCluster[vertices[:, axis] == bound[axis]], axis] = bound[axis]
+
+    # Drop facets whose corners landed in fewer than 3 cells, and all but one facet over the same 3
+    merged = vertexCluster[triangles]
+    merged = merged[(merged[:, 0] != merged[:, 1]) & (merged[:, 1] != merged[:, 2]) & (merged[:, 0] != merged[:, 2])]
+    ordered = np.sort(merged, axis=1)
+    if clusterCount < 2 ** 21:
+        _, unique = np.unique((ordered[:, 0] << 42) | (ordered[:, 1] << 21) | ordered[:, 2], return_index=True)
+    else:
+        _, unique = np.unique(ordered, axis=0, return_index=True)
+    merged = merged[np.sort(unique)]
+
+    # Cells left without a facet don't need a vertex
+    used = np.zeros(clusterCount, dtype=bool)
+    used[merged.ravel()] = True
+    renumber = np.cumsum(used) - 1
+    moved = np.sqrt(((vertices - centers[vertexCluster]) ** 2).sum(axis=1))
+    return centers[used], renumber[merged], moved
+
+def indexNumpy(coordinates, normalVectors, tolerance):
+    soup = np.asarray(coordinates, dtype=np.float32).reshape(-1, 3)
+    if not len(soup):
+        return np.empty(0, np.float32), np.empty(0, np.uint32), np.empty(0, np.float32)
+
+    # Vertices are compared as integers: grid cells with a tolerance, otherwise the float bits with
+    # -0.0 turned into 0.0 first so the two zeros match like they do as floats
+    if tolerance:
+        keys = np.round(soup.astype(np.float64) / tolerance).astype(np.int64)
+    else:
+        keys = (soup + np.float32(0)).view(np.uint32)
+
+    # Sort the keys so equal vertices sit next to each other, then number each run of equal ones
+    order = np.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+    sortedKeys = keys[order]
+    first = np.empty(len(soup), dtype=bool)
+    first[0] = True
+    np.any(sortedKeys[1:] != sortedKeys[:-1], axis=1, out=first[1:])
+
+    # lexsort is stable, so each run starts with the vertex's first appearance in the soup. Number
+    # the vertices in that order, the same as the pure-Python path, which also keeps neighbours close
+    firstSeen = order[first]
+    appearance = np.argsort(firstSeen, kind="stable")
+    runIds = np.empty(len(appearance), dtype=np.uint32)
+    runIds[appearance] = np.arange(len(appearance), dtype=np.uint32)
+
+    inverse = np.empty(len(soup), dtype=np.uint32)
+    inverse[order] = runIds[np.cumsum(first) - 1]
+    vertices = soup[firstSeen[appearance]]
+    triangles = inverse.reshape(-1, 3)
+
+    facetNormals = None
+    if normalVectors is not None and len(normalVectors):
+        facetNormals = np.asarray(normalVectors, dtype=np.float32).reshape(-1, 3)
+
+    if tolerance:
+        # Only merging vertices that weren't already equal can collapse a facet
+        keep = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])
+        if not keep.all():
+            triangles = triangles[keep]
+            facetNormals = facetNormals[keep] if facetNormals is not None else None
+
+    normals = vertexNormalsNumpy(vertices, triangles, facetNormals)
+    return vertices.ravel(), triangles.ravel(), normals.ravel()
+
+def vertexNormalsNumpy(vertices, triangles, facetNormals):
+    # The cross product is twice the facet's area long, so summing them weights each facet by area
+    corners = vertices[triangles].astype(np.float64)
+    faceNormals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+    sums = np.zeros((len(vertices), 3))
+    for axis in range(3):
+        for corner in range(3):
+            sums[:, axis] += np.bincount(triangles[:, corner], faceNormals[:, axis], len(vertices))
+
+    lengths = np.sqrt((sums * sums).sum(axis=1))
+    flat = lengths == 0
+    if flat.any() and facetNormals is not None:
+        fallback = np.zeros((len(vertices), 3))
+        for axis in range(3):
+            for corner in range(3):
+                fallback[:, axis] += np.bincount(triangles[:, corner], facetNormals[:, axis], len(vertices))
+        sums[flat] = fallback[flat]
+        lengths = np.sqrt((sums * sums).sum(axis=1))
+
+    lengths[lengths == 0] = 1
+    return (sums / lengths[:, None]).astype(np.float32)
+
+def indexPython(coordinates, normalVectors, tolerance):
+    vertices = array("f")
+    triangles = array("I")
+    ids = {}
+    keepNormals = array("f")
+
+    # Go through array('f') so keys match the float32 values the numpy path compares
+    soup = coordinates if isinstance(coordinates, array) and coordinates.typecode == "f" else array("f", coordinates)
+    for facet in range(len(soup) // 9):
+        corners = []
+        for i in range(facet * 9, facet * 9 + 9, 3):
+            point = (soup[i] + 0.0, soup[i + 1] + 0.0, soup[i + 2] + 0.0)
+            key = tuple(round(value / tolerance) for value in point) if tolerance else point
+            vertexId = ids.get(key)
+            if vertexId is None:
+                vertexId = ids[key] = len(ids)
+                vertices.extend(point)
+            corners.append(vertexId)
+
+        if tolerance and len(set(corners)) < 3:
+            continue
+        triangles.extend(corners)
+        if normalVectors is not None and len(normalVectors):
+            keepNormals.extend(normalVectors[facet * 3:facet * 3 + 3])
+
+    normals = vertexNormalsPython(vertices, triangles, keepNormals if len(keepNormals) else None)
+    return vertices, triangles, normals
+
+def vertexNormalsPython(vertices, triangles, facetNormals):
+    sums = [0.0] * len(vertices)
+    fallback = [0.0] * len(vertices)
+    for facet in range(len(triangles) // 3):
+        a, b, c = (triangles[facet * 3 + corner] * 3 for corner in range(3))
+        u = [vertices[b + axis] - vertices[a + axis] for axis in range(3)]
+        v = [vertices[c + axis] - vertices[a + axis] for axis in range(3)]
+        cross = (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+        for corner in (a, b, c):
+            for axis in range(3):
+                sums[corner + axis] += cross[axis]
+                if facetNormals is not None:
+                    fallback[corner + axis] += facetNormals[facet * 3 + axis]
+
+    normals = array("f")
+    for i in range(0, len(sums), 3):
+        vector = sums[i:i + 3]
+        length = math.sqrt(sum(value * value for value in vector))
+        if length == 0:
+            vector = fallback[i:i + 3]
+            length = math.sqrt(sum(value * value for value in vector))
+        normals.extend(value / length if length else 0.0 for value in vector)
+    return normals
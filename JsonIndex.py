@@ -0,0 +1,43 @@
+import json
+import threading
+from pathlib import Path
+
+class JsonIndex:
+
+    # A dict the script keeps on disk as JSON between runs, the base of OrderIndex, FitIndex,
+    # ListingCache and TemplateCache. Subclasses change entries while holding lock and set dirty.
+    # save() only writes when something changed, and goes through a temporary file so a crash
+    # partway through never leaves half an index behind. A missing or unreadable file starts empty.
+    # path defaults to defaultPath next to the script
+
+    defaultPath = None
+    path = None
+    entries = None
+    dirty = False
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path is not None else (Path(__file__).parent / self.defaultPath).resolve()
+        self.entries = {}
+        self.lock = threading.Lock()
+
+        try:
+            with open(self.indexPath(), "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def indexPath(self):
+        # The JSON file itself. Subclasses whose path is a folder keep it inside
+        return self.path
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            indexPath = self.indexPath()
+            indexPath.parent.mkdir(parents=True, exist_ok=True)
+            tempPath = indexPath.with_suffix(".tmp")
+            with open(tempPath, "w") as f:
+                json.dump(self.entries, f)
+            tempPath.replace(indexPath)
+            self.dirty = False
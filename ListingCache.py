@@ -0,0 +1,106 @@
+from urllib.parse import quote
+
+#Part of the script's package inside Fusion, but also imported on its own by the benchmarks
+try:
+    from .JsonIndex import JsonIndex
+except ImportError:
+    from JsonIndex import JsonIndex
+
+class ListingCache(JsonIndex):
+
+    # Keeps the last response of a listing endpoint like /api/fusionFile/all on disk along with its
+    # ETag, Last-Modified and change cursor, so polling the queue doesn't download the whole listing
+    # every run. get() makes the request conditional, and a 304 is answered from the cache. When the
+    # server hands out a cursor (X-Cursor header), the next request only asks for what changed since:
+    # {"changed": [entry, ...], "removed": [id, ...]}, merged into the cached listing by id.
+    # bytesSaved is how much smaller the answers were than the full listing last time
+
+    defaultPath = "listingCache.json"
+
+    def __init__(self, path=None):
+        super().__init__(path)
+        self.counters = {"requests": 0, "full": 0, "notModified": 0, "changes": 0, "bytesReceived": 0, "bytesSaved": 0}
+
+    def get(self, api, endpoint):
+        # api.get(endpoint), except the response's data may come from the cache
+        entry = self.entries.get(endpoint)
+        headers = {}
+        query = endpoint
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+            if entry.get("cursor"):
+                query += ("&" if "?" in endpoint else "?") + "changedSince=" + quote(entry["cursor"])
+
+        response = api.get(query, headers)
+        self.count("requests")
+        self.count("bytesReceived", response.size)
+
+        if response.status == 304 and entry is not None:
+            self.count("notModified")
+            self.count("bytesSaved", max(entry["size"] - response.size, 0))
+            response.status = 200
+            response.data = entry["data"]
+            self.update(endpoint, response, entry["size"], entry)
+            return response
+
+        if response.status != 200 or response.data is None:
+            return response
+
+        if isinstance(response.data, dict) and "changed" in response.data:
+            if entry is None:
+                # Changes to a listing we no longer have. Start over with the whole thing
+                with self.lock:
+                    self.entries.pop(endpoint, None)
+                return self.get(api, endpoint)
+            self.count("changes")
+            self.count("bytesSaved", max(entry["size"] - response.size, 0))
+            response.data = mergeListing(entry["data"], response.data["changed"], response.data.get("removed", []))
+            self.update(endpoint, response, entry["size"], entry)
+        else:
+            self.count("full")
+            self.update(endpoint, response, response.size)
+        return response
+
+    def update(self, endpoint, response, size, previous=None):
+        # A 304 or a list of changes may leave out headers the last full listing had
+        previous = previous or {}
+        with self.lock:
+            self.entries[endpoint] = {
+                "etag": response.headers.get("etag", previous.get("etag")),
+                "lastModified": response.headers.get("last-modified", previous.get("lastModified")),
+                "cursor": response.headers.get("x-cursor", previous.get("cursor")),
+                "size": size,
+                "data": response.data
+            }
+            self.dirty = True
+
+    def invalidate(self, endpoint=None):
+        with self.lock:
+            if endpoint is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(endpoint, None)
+            self.dirty = True
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+def mergeListing(listing, changed, removed):
+    # Changed entries replace the ones with the same id where they were, new ones go on the end
+    removed = {str(fileId) for fileId in removed}
+    changed = {str(file["id"]): file for file in changed}
+    merged = []
+    for file in listing:
+        fileId = str(file["id"])
+        if fileId not in removed:
+            merged.append(changed.pop(fileId, file))
+    merged.extend(file for fileId, file in changed.items() if fileId not in removed)
+    return merged
@@ -0,0 +1,48 @@
+#Part of the script's package inside Fusion, but also imported on its own by the benchmarks
+try:
+    from .JsonIndex import JsonIndex
+except ImportError:
+    from JsonIndex import JsonIndex
+
+class OrderIndex(JsonIndex):
+
+    # Remembers which order each builder file belongs to, so importFiles only has to download the
+    # files for the order being imported. The /api/fusionFile/all listing doesn't say which order a
+    # file is for, so a file's order is learned the first time it gets downloaded and kept on disk
+
+    defaultPath = "orderIndex.json"
+
+    def orderId(self, file):
+        # Use the order from the listing if the server ever starts sending it
+        if file.get("orderId") is not None:
+            return str(file["orderId"])
+        if isinstance(file.get("order"), dict) and file["order"].get("id") is not None:
+            return str(file["order"]["id"])
+        return self.entries.get(str(file["id"]))
+
+    def plan(self, files, orderID):
+        # Splits a listing into the files known to belong to orderID and the files we haven't seen
+        # yet. Only those two lists need downloading
+        matches = []
+        unknown = []
+        for file in files:
+            fileOrder = self.orderId(file)
+            if fileOrder is None:
+                unknown.append(file)
+            elif fileOrder == str(orderID):
+                matches.append(file)
+        return matches, unknown
+
+    def record(self, fileId, orderId):
+        with self.lock:
+            if self.entries.get(str(fileId)) != str(orderId):
+                self.entries[str(fileId)] = str(orderId)
+                self.dirty = True
+
+    def prune(self, files):
+        # Drop files that have left the queue so the index stays the size of the queue
+        listed = {str(file["id"]) for file in files}
+        with self.lock:
+            for fileId in [fileId for fileId in self.entries if fileId not in listed]:
+                del self.entries[fileId]
+                self.dirty = True
@@ -0,0 +1,98 @@
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+class RunReport:
+
+    # Where the time in a run went. Stages are timed with span() and added up per stage, both for the
+    # whole run and for the order being worked on (see order()), along with counters like api calls
+    # and bytes downloaded and each order's results. write() saves it all as JSON in the reports
+    # folder, plus a cProfile dump of the run when profile is on
+
+    path = None
+    profile = False
+    profiler = None
+    currentOrder = None
+
+    def __init__(self, path=None, profile=False):
+        self.path = Path(path) if path is not None else (Path(__file__).parent / "reports").resolve()
+        self.profile = profile
+        self.started = time.time()
+        self.startedClock = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.orders = {}
+
+    def start(self):
+        if self.profile and self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage, seconds):
+        targets = [self.stages]
+        if self.currentOrder is not None:
+            targets.append(self.currentOrder["stages"])
+        for stages in targets:
+            entry = stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += seconds
+            entry["count"] += 1
+
+    def count(self, name, amount=1):
+        targets = [self.counters]
+        if self.currentOrder is not None:
+            targets.append(self.currentOrder["counters"])
+        for counters in targets:
+            counters[name] = counters.get(name, 0) + amount
+
+    @contextmanager
+    def order(self, orderID):
+        # Spans and counts inside this block go towards orderID as well as the run
+        previous, self.currentOrder = self.currentOrder, self.orderReport(orderID)
+        start = time.perf_counter()
+        try:
+            yield self.currentOrder
+        finally:
+            self.currentOrder["seconds"] += time.perf_counter() - start
+            self.currentOrder = previous
+
+    def result(self, orderID, result):
+        self.orderReport(orderID)["results"].append(result)
+
+    def orderReport(self, orderID):
+        return self.orders.setdefault(str(orderID), {"seconds": 0.0, "stages": {}, "counters": {}, "results": []})
+
+    def write(self, **extra):
+        # extra is saved as is, e.g. api=api.stats(). Returns the path of the report
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "seconds": time.perf_counter() - self.startedClock,
+            "stages": self.stages,
+            "counters": self.counters,
+            "orders": self.orders
+        }
+        report.update(extra)
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            profilePath = self.path / f"run-{stamp}.prof"
+            self.profiler.dump_stats(str(profilePath))
+            report["profile"] = str(profilePath)
+            self.profiler = None
+
+        reportPath = self.path / f"run-{stamp}.json"
+        with open(reportPath, "w") as f:
+            json.dump(report, f, indent=2)
+        return reportPath
@@ -0,0 +1,614 @@
+#Helpers for turning the builder's .stl payloads into coordinate and normal arrays
+#NumPy is not bundled with every Fusion install, so everything here has a pure-Python fallback
+import io
+import mmap
+import multiprocessing
+import os
+import struct
+import warnings
+from array import array
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+#Keywords that start each of the 7 lines of a facet, in order
+FACET_KEYWORDS = (b"facet normal", b"outer loop", b"vertex", b"vertex", b"vertex", b"endloop", b"endfacet")
+
+#Bytes .split() treats as whitespace within an ascii line
+INDENT = b" \t\r\x0b\x0c"
+
+#How many numbers follow the keyword on each of the 7 lines of a facet
+FACET_NUMBERS = (3, 0, 3, 3, 3, 0, 0)
+
+#Binary .stl layout: 80 byte header, uint32 facet count, then one 50 byte record per facet
+BINARY_HEADER_SIZE = 84
+BINARY_RECORD_SIZE = 50
+
+#How much StlReader reads at a time. Big enough that per-chunk overhead disappears, small enough
+#that the raw text never outweighs the arrays it parses into
+CHUNK_SIZE = 4 * 1024 * 1024
+
+#Ascii meshes smaller than this are parsed serially by parseStlParallel. Starting the worker
+#processes and copying the text into shared memory costs more than it saves below it
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+
+if HAS_NUMPY:
+    INDENT_TABLE = np.zeros(256, dtype=bool)
+    INDENT_TABLE[list(INDENT)] = True
+    SEPARATOR_TABLE = INDENT_TABLE.copy()
+    SEPARATOR_TABLE[ord("\n")] = True
+    BLANK_WORD = np.uint64(int.from_bytes(b" " * 8, "little"))
+    BINARY_RECORD = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (9,)), ("attribute", "<u2")])
+
+
+def toBuffer(meshData):
+    #The builder sends the mesh as a list of byte values, but files and buffers should work too.
+    #Buffers are passed through untouched so binary meshes can be read without a copy
+    if isinstance(meshData, str):
+        return meshData.encode()
+    if isinstance(meshData, (bytes, bytearray, memoryview, mmap.mmap)):
+        return meshData
+    return bytes(meshData)
+
+
+def isBinary(data):
+    #Binary files may also start with "solid", so go by whether the size matches the facet count
+    if len(data) < BINARY_HEADER_SIZE:
+        return False
+    facetCount = struct.unpack_from("<I", data, 80)[0]
+    return len(data) == BINARY_HEADER_SIZE + facetCount * BINARY_RECORD_SIZE
+
+
+def parseStl(meshData, vectorized=True):
+    #Returns (meshName, coordinates, normalVectors) where coordinates holds 9 floats per facet and
+    #normalVectors holds 3. Both are contiguous float32 buffers: numpy arrays on the vectorized path,
+    #array('f') on the pure-Python path, with identical values either way. Ascii and binary .stl
+    #are both accepted
+    data = toBuffer(meshData)
+
+    if isBinary(data):
+        if vectorized and HAS_NUMPY:
+            return parseBinaryNumpy(data)
+        return parseBinaryPython(data)
+
+    if not isinstance(data, bytes):
+        data = bytes(data)
+
+    if vectorized and HAS_NUMPY:
+        result = parseAsciiNumpy(data)
+        if result is not None:
+            return result
+
+    # The vectorized path bails out on anything it can't validate in bulk. The line by line parser
+    # then either handles the odd formatting or raises the same line numbered error as always
+    return parseAsciiPython(data)
+
+
+def parseStlFile(path, vectorized=True):
+    #Parses an .stl on disk. Binary files are read through a memory map, so they never get read into
+    #Python bytes. Ascii files go through StlReader a chunk at a time, so a large scan's text is
+    #never held whole on top of the arrays it parses into
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return parseStl(b"", vectorized)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if isBinary(mm):
+                return parseStl(mm, vectorized)
+        return StlReader(f, vectorized=vectorized).read()
+
+
+def parseStlParallel(meshData, workers=None, threshold=PARALLEL_THRESHOLD):
+    #parseStl with the facet lines of a large ascii mesh split between worker processes. The text
+    #goes into shared memory once, each worker parses its chunk with the same bulk parser parseStl
+    #uses and writes the floats straight into a shared output array, so nothing big is pickled.
+    #Anything the bulk parser won't take, malformed files included, is handed to parseStl as a whole
+    #so the result and the line numbered errors are exactly the serial ones
+    data = toBuffer(meshData)
+    workers = workers or os.cpu_count() or 1
+    if not HAS_NUMPY or workers < 2 or len(data) < threshold or isBinary(data):
+        return parseStl(data)
+
+    layout = asciiLayout(data)
+    chunks = facetChunks(data, layout, workers) if layout is not None else None
+    if chunks is None:
+        return parseStl(data)
+    facetCount = chunks[-1][2] + chunks[-1][3]
+
+    source = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    output = shared_memory.SharedMemory(create=True, size=max(facetCount * 48, 1))
+    try:
+        source.buf[:len(data)] = data
+        with multiprocessing.get_context().Pool(min(workers, len(chunks))) as pool:
+            parsed = pool.starmap(parseChunk, [(source.name, output.name) + chunk for chunk in chunks])
+
+        if not all(parsed):
+            return parseStl(data)
+
+        facets = np.ndarray((facetCount, 12), dtype=np.float32, buffer=output.buf)
+        result = layout[0], facets[:, 3:].ravel(), facets[:, :3].ravel()
+        del facets
+        return result
+    finally:
+        source.close()
+        source.unlink()
+        output.close()
+        output.unlink()
+
+
+def facetChunks(data, layout, count):
+    #Splits the facet lines into about count (start, end, first facet, facet count) chunks, each cut
+    #just after an "endfacet" line. None when a chunk isn't whole facets, which the serial parser
+    #will then report on
+    meshName, headerEnd, footerStart = layout
+    start = headerEnd + 1
+    size = (footerStart - start) // count + 1
+    chunks = []
+    firstFacet = 0
+    while start < footerStart:
+        cut = data.find(b"endfacet", min(start + size, footerStart), footerStart)
+        cut = footerStart if cut < 0 else data.find(b"\n", cut, footerStart)
+        cut = footerStart if cut < 0 else cut
+
+        # The body of each chunk runs up to, but not including, its last newline like the serial one
+        lineCount = data.count(b"\n", start, cut) + 1
+        if lineCount % 7:
+            return None
+        chunks.append((start, cut, firstFacet, lineCount // 7))
+        firstFacet += lineCount // 7
+        start = cut + 1
+    return chunks or None
+
+
+def parseChunk(sourceName, outputName, start, end, firstFacet, facetCount):
+    #Runs in a worker process. Returns False if the bulk parser won't take the chunk
+    source = shared_memory.SharedMemory(name=sourceName)
+    output = shared_memory.SharedMemory(name=outputName)
+    try:
+        body = source.buf[start:end]
+        facets = bodyFacets(body)
+        body.release()
+        if facets is None or len(facets) != facetCount:
+            return False
+        target = np.ndarray((facetCount, 12), dtype=np.float32, buffer=output.buf, offset=firstFacet * 48)
+        target[:] = facets
+        del target
+        return True
+    finally:
+        source.close()
+        output.close()
+
+
+def binaryName(data):
+    #Binary headers are free text. Exporters often copy the ascii "solid <name>" line in there
+    words = bytes(data[:80]).split(b"\0")[0].split()
+    if words and words[0] == b"solid":
+        words = words[1:]
+    return words[0].decode(errors="replace") if words else ""
+
+
+def parseBinaryNumpy(data):
+    facetCount = (len(data) - BINARY_HEADER_SIZE) // BINARY_RECORD_SIZE
+    if facetCount == 0:
+        return binaryName(data), np.empty(0, np.float32), np.empty(0, np.float32)
+
+    # A structured view straight over the buffer. Flattening the two fields is the only copy made
+    records = np.frombuffer(data, dtype=BINARY_RECORD, count=facetCount, offset=BINARY_HEADER_SIZE)
+    return binaryName(data), records["vertices"].reshape(-1), records["normal"].reshape(-1)
+
+
+def parseBinaryPython(data):
+    coordinates = array("f")
+    normalVectors = array("f")
+
+    for record in struct.iter_unpack("<12f2x", memoryview(data)[BINARY_HEADER_SIZE:]):
+        normalVectors.extend(record[:3])
+        coordinates.extend(record[3:])
+
+    return binaryName(data), coordinates, normalVectors
+
+
+def parseAsciiPython(data):
+    coordinates = array("f")
+    normalVectors = array("f")
+
+    # Decode the data and split into individual lines
+    lines = data.splitlines()
+    if not lines:
+        return "", coordinates, normalVectors
+
+    # First line of file has format "solid <mesh name>", last line has format "endsolid <mesh name>"
+    meshName = headerName(lines[0])
+    if len(lines) > 1:
+        parseFacetLines(lines[1:-1], 1, coordinates, normalVectors)
+        checkFooter(lines[-1], meshName)
+
+    return meshName, coordinates, normalVectors
+
+
+def lineWords(lineBytes):
+    #The line split on whitespace. A blank line comes back as [""] rather than [], so checking its
+    #first word raises the line's own error instead of an IndexError
+    return lineBytes.decode().split() or [""]
+
+
+def headerName(lineBytes):
+    line = lineWords(lineBytes)
+    if line[0] != "solid":
+        raise Exception("First line of the .stl must start with 'solid'")
+    return line[1]
+
+
+def checkFooter(lineBytes, meshName):
+    line = lineWords(lineBytes)
+    if line[0] != "endsolid":
+        raise Exception("Last line of the .stl must start with 'endsolid'")
+    if line[1] != meshName:
+        raise Exception("Last line of the .stl must end with the mesh name")
+
+
+def parseFacetLines(lines, firstLine, coordinates, normalVectors):
+    #Checks facet lines against the 7 line layout and appends their floats. firstLine is the line
+    #number of lines[0] in the whole file, so errors point at the right line when parsing in chunks
+    for i, lineBytes in enumerate(lines, firstLine):
+
+        # Split the line on whitespace
+        line = lineWords(lineBytes)
+
+        # First line in group of 7 has format "facet normal <x> <y> <z>"
+        if (i - 1) % 7 == 0:
+            if line[0] != "facet" or line[1:2] != ["normal"]:
+                raise Exception(f"Line {i} of the .stl must begin with 'facet normal'")
+            if len(line) < 5:
+                raise Exception(f"Line {i} of the .stl must have 3 numbers")
+            normalVectors.append(float(line[2]))
+            normalVectors.append(float(line[3]))
+            normalVectors.append(float(line[4]))
+
+        # Second line in group of 7 is "outer loop"
+        elif (i - 2) % 7 == 0:
+            if line[0] != "outer" or line[1:2] != ["loop"]:
+                raise Exception(f"Line {i} of the .stl must be 'outer loop'")
+
+        # Third, fourth, and fifth lines in group of 7 have format "vertex <x> <y> <z>"
+        elif (i - 3) % 7 == 0 or (i - 4) % 7 == 0 or (i - 5) % 7 == 0:
+            if line[0] != "vertex":
+                raise Exception(f"Line {i} of the .stl must begin with 'vertex'")
+            if len(line) < 4:
+                raise Exception(f"Line {i} of the .stl must have 3 numbers")
+            coordinates.append(float(line[1]))
+            coordinates.append(float(line[2]))
+            coordinates.append(float(line[3]))
+
+        # Sixth line in group of 7 is "endloop"
+        elif (i - 6) % 7 == 0:
+            if line[0] != "endloop":
+                raise Exception(f"Line {i} of the .stl must be 'endloop'")
+
+        # Seventh line in group of 7 is "endfacet"
+        elif (i - 7) % 7 == 0:
+            if line[0] != "endfacet":
+                raise Exception(f"Line {i} of the .stl must be 'endfacet'")
+
+        # Should never hit this case
+        else:
+            raise Exception(f"Parsing failed for .stl on line {i}")
+
+
+def parseAsciiNumpy(data):
+    #Bulk parser. Returns None instead of raising so the caller can fall back to the line parser
+    layout = asciiLayout(data)
+    if layout is None:
+        return None
+    meshName, headerEnd, footerStart = layout
+
+    facets = bodyFacets(memoryview(data)[headerEnd + 1:footerStart])
+    if facets is None:
+        return None
+
+    return meshName, facets[:, 3:].ravel(), facets[:, :3].ravel()
+
+
+def asciiLayout(data):
+    #(meshName, headerEnd, footerStart) with the facet lines between the two newlines, or None if the
+    #header and footer lines aren't what the bulk parsers expect
+    headerEnd = data.find(b"\n")
+    if headerEnd < 0:
+        return None
+
+    if hasLoneReturn(data):
+        return None
+
+    # splitlines() ignores a single trailing newline, so we do the same
+    end = len(data) - 1 if data.endswith(b"\n") else len(data)
+    footerStart = data.rfind(b"\n", 0, end)
+    if footerStart <= headerEnd:
+        return None
+
+    header = data[:headerEnd].split()
+    footer = data[footerStart + 1:end].split()
+    if len(header) < 2 or header[0] != b"solid":
+        return None
+    if len(footer) < 2 or footer[0] != b"endsolid" or footer[1] != header[1]:
+        return None
+    return header[1].decode(), headerEnd, footerStart
+
+
+def hasLoneReturn(data):
+    #splitlines() also breaks on a lone carriage return, which would throw the line count off
+    return b"\r" in data and data.count(b"\r") != data.count(b"\r\n")
+
+
+def bodyFacets(body):
+    #Parses the facet lines between "solid" and "endsolid" (as a memoryview, to avoid a copy) into an (n, 12) float32 array of
+    #normal x/y/z followed by the three vertices, or None if the lines aren't laid out as expected
+    buf = np.frombuffer(body, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    lineCount = len(newlines) + 1
+    if lineCount % 7 != 0:
+        return None
+    facetCount = lineCount // 7
+
+    # Keywords are compared eight bytes at a time through an unaligned uint64 view over the buffer,
+    # so each check is a single gather per line. Row j of lineStarts holds line j of every facet
+    padded = np.concatenate((buf, np.zeros(len(FACET_KEYWORDS[0]), dtype=np.uint8)))
+    words = np.ndarray(shape=(len(padded) - 7,), dtype="<u8", buffer=padded, strides=(1,))
+    lineStarts = np.concatenate(([0], newlines + 1))
+
+    # Exporters indent every facet the same way, so first try the first facet's indentation everywhere
+    firstFacet = bytes(body[:lineStarts[7] if facetCount > 1 else len(body)]).split(b"\n")[:7]
+    prefixes = [line[:len(line) - len(line.lstrip(INDENT))] + keyword for line, keyword in zip(firstFacet, FACET_KEYWORDS)]
+    starts = lineStarts.reshape(facetCount, 7).T
+
+    if not matchPrefixes(words, starts, prefixes):
+        # Otherwise walk each line start past its own indentation to find where the keyword begins
+        indented = np.flatnonzero(INDENT_TABLE[padded[lineStarts]])
+        while indented.size:
+            lineStarts[indented] += 1
+            indented = indented[INDENT_TABLE[padded[lineStarts[indented]]]]
+
+        prefixes = FACET_KEYWORDS
+        starts = lineStarts.reshape(facetCount, 7).T
+        if not matchPrefixes(words, starts, prefixes):
+            return None
+
+    # A keyword has to end where its word does, "vertex4" isn't "vertex"
+    for row, prefix in zip(starts, prefixes):
+        after = row + len(prefix)
+        if not np.all(SEPARATOR_TABLE[padded[after]] | (after >= len(buf))):
+            return None
+
+    # Blank out the keywords so only the numbers are left behind, then read them all in one pass
+    for row, prefix in zip(starts, prefixes):
+        for offset, expected, mask in prefixWindows(prefix):
+            positions = row + offset
+            words[positions] = words[positions] & ~mask | BLANK_WORD & mask
+
+    # Every line has to carry its own numbers, or the total below could come out right with them
+    # shifted from one line to the next. Count where each word starts, line by line. Comparing is
+    # far quicker than a table lookup, and the other control characters it takes for whitespace
+    # make np.fromstring fail anyway
+    separators = padded[:len(buf)] <= ord(" ")
+    wordStarts = ~separators
+    wordStarts[1:] &= separators[:-1]
+    numbers = np.add.reduceat(wordStarts, np.concatenate(([0], newlines + 1))) if len(buf) else np.zeros(lineCount, int)
+    if not np.array_equal(numbers.reshape(facetCount, 7), np.broadcast_to(FACET_NUMBERS, (facetCount, 7))):
+        return None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(padded[:len(buf)].tobytes(), dtype=np.float64, sep=" ")
+        except (ValueError, DeprecationWarning):
+            return None
+
+    if values.size != facetCount * 12:
+        return None
+
+    # Round through float64 like the Python parser does so both paths agree bit for bit
+    return values.reshape(facetCount, 12).astype(np.float32)
+
+
+def matchPrefixes(words, starts, prefixes):
+    #Checks that every line in row j of starts begins with prefixes[j]
+    for row, prefix in zip(starts, prefixes):
+        for offset, expected, mask in prefixWindows(prefix):
+            if np.any(words[row + offset] & mask != expected):
+                return False
+    return True
+
+
+def prefixWindows(prefix):
+    #Splits a line prefix into (offset, expected, mask) uint64 windows. Prefixes longer than 8 bytes
+    #get a final window that overlaps the one before it rather than running past the prefix
+    offsets = list(range(0, len(prefix) - 8, 8)) + [max(len(prefix) - 8, 0)]
+    windows = []
+    for offset in offsets:
+        chunk = prefix[offset:offset + 8]
+        expected = int.from_bytes(chunk.ljust(8, b"\0"), "little")
+        mask = int.from_bytes((b"\xff" * len(chunk)).ljust(8, b"\0"), "little")
+        windows.append((offset, np.uint64(expected), np.uint64(mask)))
+    return windows
+
+
+def remainingSize(f):
+    #Bytes left in a file handle, or None when it can't seek
+    try:
+        position = f.tell()
+        end = f.seek(0, io.SEEK_END)
+        f.seek(position)
+        return end - position
+    except (AttributeError, OSError):
+        return None
+
+
+def facetCut(pending):
+    #Finds where the last whole facet in pending ends, holding back the last complete line since it
+    #may turn out to be the "endsolid" footer. Returns (cut, lineCount) with lineCount a multiple of 7
+    newlineCount = pending.count(b"\n")
+    lineCount = (newlineCount - 1) // 7 * 7
+    if lineCount <= 0:
+        return 0, 0
+
+    # Walking back from the end takes at most 8 searches
+    cut = len(pending)
+    for _ in range(newlineCount - lineCount + 1):
+        cut = pending.rfind(b"\n", 0, cut)
+    return cut + 1, lineCount
+
+
+class StlReader:
+    #Streams an ascii or binary .stl from a file handle or in-memory mesh data in fixed size chunks,
+    #so the raw text is never held all at once. batches() hands facets on as each chunk is parsed,
+    #which lets Fusion take a large mesh a piece at a time. read() collects everything into arrays
+    #preallocated from a facet count estimate and returns the same tuple as parseStl
+
+    meshName = ""
+    binary = False
+    facetCount = None
+    size = None
+    bytesParsed = 0
+    facetsParsed = 0
+
+    def __init__(self, source, chunkSize=CHUNK_SIZE, vectorized=True):
+        self.file = source if hasattr(source, "read") else io.BytesIO(toBuffer(source))
+        self.chunkSize = chunkSize
+        self.vectorized = vectorized and HAS_NUMPY
+        self.size = remainingSize(self.file)
+
+        # Binary files may also start with "solid", so when the size is known go by the facet count
+        self.header = self.file.read(BINARY_HEADER_SIZE)
+        if len(self.header) == BINARY_HEADER_SIZE:
+            facetCount = struct.unpack_from("<I", self.header, 80)[0]
+            if self.size is not None:
+                self.binary = self.size == BINARY_HEADER_SIZE + facetCount * BINARY_RECORD_SIZE
+            else:
+                self.binary = not self.header.startswith(b"solid")
+            if self.binary:
+                self.facetCount = facetCount
+                self.meshName = binaryName(self.header)
+
+    def batches(self):
+        #Yields (coordinates, normalVectors) for each chunk, as numpy arrays or array('f') like parseStl
+        if self.binary:
+            return self.binaryBatches()
+        return self.asciiBatches()
+
+    def read(self):
+        coordinates = np.empty(0, np.float32) if self.vectorized else array("f")
+        normalVectors = np.empty(0, np.float32) if self.vectorized else array("f")
+        count = 0
+
+        for batchCoordinates, batchNormals in self.batches():
+            batchCount = len(batchNormals) // 3
+            if not self.vectorized:
+                coordinates.extend(batchCoordinates)
+                normalVectors.extend(batchNormals)
+                continue
+
+            # Only grows again if the estimate from the first chunk turns out to be low
+            if count + batchCount > len(normalVectors) // 3:
+                capacity = max(self.estimateFacets(), count + batchCount)
+                coordinates.resize(capacity * 9, refcheck=False)
+                normalVectors.resize(capacity * 3, refcheck=False)
+            coordinates[count * 9:(count + batchCount) * 9] = batchCoordinates
+            normalVectors[count * 3:(count + batchCount) * 3] = batchNormals
+            count += batchCount
+
+        if self.vectorized:
+            coordinates.resize(count * 9, refcheck=False)
+            normalVectors.resize(count * 3, refcheck=False)
+
+        return self.meshName, coordinates, normalVectors
+
+    def estimateFacets(self):
+        if self.facetCount is not None:
+            return self.facetCount
+        if self.size is None or not self.bytesParsed:
+            return self.facetsParsed * 2
+
+        # Ascii facets are close enough to the same length that the first chunk is a good sample
+        return int(self.size * self.facetsParsed / self.bytesParsed * 1.02) + 1
+
+    def binaryBatches(self):
+        recordsPerChunk = max(self.chunkSize // BINARY_RECORD_SIZE, 1)
+        remaining = self.facetCount
+
+        while remaining:
+            data = self.file.read(min(remaining, recordsPerChunk) * BINARY_RECORD_SIZE)
+            if not data or len(data) % BINARY_RECORD_SIZE:
+                raise Exception("Binary .stl ends partway through its facets")
+
+            chunkCount = len(data) // BINARY_RECORD_SIZE
+            remaining -= chunkCount
+            self.facetsParsed += chunkCount
+            if self.vectorized:
+                records = np.frombuffer(data, dtype=BINARY_RECORD)
+                yield records["vertices"].reshape(-1), records["normal"].reshape(-1)
+            else:
+                _, coordinates, normalVectors = parseBinaryPython(bytes(BINARY_HEADER_SIZE) + data)
+                yield coordinates, normalVectors
+
+    def asciiBatches(self):
+        # First line of file has format "solid <mesh name>"
+        pending = self.header
+        while b"\n" not in pending:
+            chunk = self.file.read(self.chunkSize)
+            if not chunk:
+                break
+            pending += chunk
+
+        lines = pending.split(b"\n", 1)
+        if not lines[0] and len(lines) == 1:
+            return
+        self.meshName = headerName(lines[0])
+        pending = lines[1] if len(lines) > 1 else b""
+        self.bytesParsed = len(lines[0]) + 1
+        lineNumber = 1
+
+        while True:
+            chunk = self.file.read(self.chunkSize)
+            if not chunk:
+                break
+            pending += chunk
+
+            # Facets that straddle the end of the chunk wait in pending for the next read
+            cut, lineCount = facetCut(pending)
+            if lineCount:
+                self.bytesParsed += cut
+                batch = self.asciiChunk(pending[:cut], lineNumber)
+                lineNumber += lineCount
+                pending = pending[cut:]
+                yield batch
+
+        # Whatever is left is the last few facets followed by "endsolid <mesh name>"
+        # The footer is checked before the batch goes out, the same order parseStl raises in, so a
+        # file cut off partway through a facet never hands on half of it
+        lines = pending.splitlines()
+        if lines:
+            batch = self.lineChunk(lines[:-1], lineNumber) if len(lines) > 1 else None
+            checkFooter(lines[-1], self.meshName)
+            if batch is not None:
+                yield batch
+
+    def asciiChunk(self, body, lineNumber):
+        if self.vectorized and not hasLoneReturn(body):
+            facets = bodyFacets(memoryview(body)[:-1] if body.endswith(b"\n") else memoryview(body))
+            if facets is not None:
+                self.facetsParsed += len(facets)
+                return facets[:, 3:].ravel(), facets[:, :3].ravel()
+
+        return self.lineChunk(body.splitlines(), lineNumber)
+
+    def lineChunk(self, lines, lineNumber):
+        coordinates = array("f")
+        normalVectors = array("f")
+        parseFacetLines(lines, lineNumber, coordinates, normalVectors)
+        self.facetsParsed += len(normalVectors) // 3
+        if self.vectorized:
+            return np.frombuffer(coordinates, np.float32), np.frombuffer(normalVectors, np.float32)
+        return coordinates, normalVectors
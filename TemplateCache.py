@@ -0,0 +1,67 @@
+import re
+#Part of the script's package inside Fusion, but also imported on its own by the benchmarks
+try:
+    from .JsonIndex import JsonIndex
+except ImportError:
+    from JsonIndex import JsonIndex
+
+class TemplateCache(JsonIndex):
+
+    # Local copies of the starter files as Fusion archives (.f3d), so an order can start from a new
+    # document imported off disk instead of a cloud copy of the starter that then has to be opened
+    # from the cloud again. Each starter is kept under its name along with the version id it was
+    # exported from. get() is handed the starter's data file as just listed from the production
+    # folder, so once someone saves a new version of a starter the id no longer matches and the next
+    # order exports it again. Only needs .name and .versionId from the data file
+
+    # path is the folder the archives go in, with the index of them kept alongside as templates.json
+    defaultPath = "cache/templates"
+
+    def __init__(self, path=None):
+        super().__init__(path)
+        self.counters = {"hits": 0, "exports": 0, "updates": 0}
+
+    def indexPath(self):
+        return self.path / "templates.json"
+
+    def get(self, dataFile, export):
+        # Path of the archive for dataFile's current version. export(dataFile, path) writes the
+        # archive when we don't have that version yet
+        versionId = dataFile.versionId
+        with self.lock:
+            entry = self.entries.get(dataFile.name)
+            if entry is not None and entry["versionId"] == versionId and (self.path / entry["file"]).exists():
+                self.counters["hits"] += 1
+                return self.path / entry["file"]
+
+            self.path.mkdir(parents=True, exist_ok=True)
+            stem = re.sub(r"[^\w.-]", "_", f"{dataFile.name}-{versionId}")
+            fileName = stem + ".f3d"
+            # Fusion's exporters add the format's extension to a name without it, so the temporary
+            # name has to end in .f3d too
+            tempPath = self.path / (stem + ".tmp.f3d")
+            export(dataFile, tempPath)
+            tempPath.replace(self.path / fileName)
+
+            # The archive of the version this one replaces is no use anymore
+            if entry is not None:
+                self.counters["updates"] += 1
+                if entry["file"] != fileName:
+                    (self.path / entry["file"]).unlink(missing_ok=True)
+            self.counters["exports"] += 1
+            self.entries[dataFile.name] = {"versionId": versionId, "file": fileName}
+            self.dirty = True
+            return self.path / fileName
+
+    def invalidate(self, name=None):
+        with self.lock:
+            names = list(self.entries) if name is None else [name]
+            for name in names:
+                entry = self.entries.pop(name, None)
+                if entry is not None:
+                    (self.path / entry["file"]).unlink(missing_ok=True)
+                    self.dirty = True
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, templates=len(self.entries))
@@ -0,0 +1,78 @@
+#Wall time and peak Python memory to download and decode builder files with ascii meshes: reading
+#the whole body and json.loads the way Response used to, versus Api with gzip and Node Buffers read
+#straight into bytes, against the local stand-in server
+#Usage: python benchmarks/bench_api_decode.py [file count] [facets per mesh]
+import http.client
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+from Stl import parseStl
+from sandcastle import Sandcastle, TOKEN
+
+
+def oldGet(host, endpoint):
+    # Response before this change: whole body, decoded to a str, json.loads with a list of ints
+    conn = http.client.HTTPConnection(host)
+    conn.request("GET", endpoint, headers={"Authorization": TOKEN})
+    data = json.loads(conn.getresponse().read().decode("utf-8"))
+    conn.close()
+    return data
+
+
+def measure(fetch, fileCount):
+    # Timed without tracemalloc, which slows down allocation heavy code far more than the rest, then
+    # run again under it for the peak
+    facets = 0
+    start = time.perf_counter()
+    for fileId in range(1, fileCount + 1):
+        data = fetch(f"/api/fusionFile/{fileId}")
+        facets += len(parseStl(data["mesh"]["data"])[2]) // 3
+    elapsed = time.perf_counter() - start
+    data = None
+
+    tracemalloc.start()
+    for fileId in range(1, fileCount + 1):
+        parseStl(fetch(f"/api/fusionFile/{fileId}")["mesh"]["data"])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return facets, elapsed, peak
+
+
+def main(fileCount, facetCount):
+    print(f"{'run':>16} {'facets':>8} {'MB sent':>8} {'seconds':>8} {'peak MB':>8}")
+    with Sandcastle(fileCount, facetCount, compress=True) as server:
+        host = server.config()["api"]["url"]
+        for fileId in range(1, fileCount + 1):
+            oldGet(host, f"/api/fusionFile/{fileId}")
+        runs = (
+            ("json.loads", lambda endpoint: oldGet(host, endpoint)),
+            ("identity", None),
+            ("gzip", None),
+        )
+        for label, fetch in runs:
+            api = None
+            if fetch is None:
+                config = server.config()
+                config["api"]["compress"] = label == "gzip"
+                api = Api.Api(config)
+                api.get("/api/fusionFile/all")
+                fetch = lambda endpoint: api.get(endpoint).data
+                # Warm the stand-in's body cache so encoding doesn't count towards the client
+                for fileId in range(1, fileCount + 1):
+                    api.get(f"/api/fusionFile/{fileId}")
+            sentBefore = server.counters["bytesSent"]
+            facets, elapsed, peak = measure(fetch, fileCount)
+            sent = (server.counters["bytesSent"] - sentBefore) / 2
+            print(f"{label:>16} {facets:>8} {sent / 1e6:>8.2f} {elapsed:>8.3f} {peak / 1e6:>8.1f}")
+            if api is not None:
+                api.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2, int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
@@ -0,0 +1,36 @@
+#Times the importFiles request loop (the listing, then every builder file) against the local
+#stand-in server, with and without keep-alive connection reuse
+#Usage: python benchmarks/bench_api_pool.py [file count] [handshake ms]
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+from sandcastle import Sandcastle
+
+
+def importLoop(api):
+    files = api.get("/api/fusionFile/all").data
+    for file in files:
+        if api.get(f"/api/fusionFile/{file['id']}").status != 200:
+            raise Exception(f"Could not get file {file['id']}")
+
+
+def main(fileCount, handshake):
+    print(f"{'mode':>10} {'files':>6} {'connections':>12} {'seconds':>8}")
+    for mode, poolSize in (("per-call", 0), ("pooled", 4)):
+        with Sandcastle(fileCount, facetCount=50, handshake=handshake) as server:
+            config = server.config()
+            config["api"]["poolSize"] = poolSize
+            start = time.perf_counter()
+            api = Api.Api(config)
+            importLoop(api)
+            elapsed = time.perf_counter() - start
+            api.close()
+            print(f"{mode:>10} {fileCount:>6} {server.counters['connections']:>12} {elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50, float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.03)
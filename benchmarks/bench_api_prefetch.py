@@ -0,0 +1,43 @@
+#Times downloading every builder file one after another versus through Api.getMany, against the
+#local stand-in server with a fixed delay on each response
+#Usage: python benchmarks/bench_api_prefetch.py [file count] [latency ms]
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+from sandcastle import Sandcastle
+
+
+def sequential(api, endpoints):
+    return [api.get(endpoint) for endpoint in endpoints]
+
+
+def prefetched(api, endpoints):
+    return list(api.getMany(endpoints))
+
+
+def main(fileCount, latency):
+    print(f"{'mode':>11} {'files':>6} {'failed':>7} {'seconds':>8}")
+    for mode, fetch in (("sequential", sequential), ("getMany", prefetched)):
+        with Sandcastle(fileCount, facetCount=200, latency=latency) as server:
+            api = Api.Api(server.config())
+            files = api.get("/api/fusionFile/all").data
+
+            # One id that doesn't exist, to show a failure stays with its own file
+            endpoints = [f"/api/fusionFile/{file['id']}" for file in files] + ["/api/fusionFile/0"]
+            start = time.perf_counter()
+            responses = fetch(api, endpoints)
+            elapsed = time.perf_counter() - start
+            api.close()
+
+            if [r.data["id"] for r in responses[:-1]] != [file["id"] for file in files]:
+                raise Exception(f"{mode} returned files out of order")
+            failed = sum(r.status != 200 for r in responses)
+            print(f"{mode:>11} {fileCount:>6} {failed:>7} {elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50, float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.1)
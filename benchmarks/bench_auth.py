@@ -0,0 +1,45 @@
+#Logins and time to the first response for a fresh launch, logging in every launch versus reusing
+#Api's token cache, against the local stand-in server. Also revokes the token under a burst of
+#concurrent requests to check they share a single refresh
+#Usage: python benchmarks/bench_auth.py [launches] [seconds of latency]
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+from sandcastle import Sandcastle
+
+
+def main(launches, latency):
+    print(f"{'run':>12} {'logins':>7} {'seconds per launch':>19}")
+    with tempfile.TemporaryDirectory() as tempDir, Sandcastle(10, 10, latency=latency) as server:
+        for label, tokenCache in (("no cache", None), ("token cache", str(Path(tempDir) / "tokenCache.json"))):
+            config = server.config()
+            config["api"]["tokenCache"] = tokenCache
+            loginsBefore = server.counters["logins"]
+            start = time.perf_counter()
+            for _ in range(launches):
+                # A launch: constructing Api sends nothing, the first request logs in if it has to
+                api = Api.Api(config)
+                assert api.get("/api/fusionFile/all").status == 200
+                api.close()
+            elapsed = time.perf_counter() - start
+            print(f"{label:>12} {server.counters['logins'] - loginsBefore:>7} {elapsed / launches:>19.3f}")
+
+        # A revoked token: every request in the burst gets a 401, one refresh serves them all
+        config = server.config()
+        api = Api.Api(config)
+        api.get("/api/fusionFile/all")
+        server.revoke()
+        loginsBefore = server.counters["logins"]
+        responses = list(api.getMany(f"/api/fusionFile/{fileId}" for fileId in range(1, 11)))
+        assert all(response.status == 200 for response in responses)
+        print(f"revoked token under 10 concurrent requests: {server.counters['logins'] - loginsBefore} login")
+        api.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, float(sys.argv[2]) if len(sys.argv) > 2 else 0.05)
@@ -0,0 +1,53 @@
+#Time, logins, requests and folder listings to import a batch of orders, launching File_Creator once
+#per order versus once for all of them with importFiles' batch mode. Each launch is the script itself,
+#run by mockadsk.loadFileCreator against the local stand-in server and a mock folder tree, so it
+#covers everything importFiles shares between orders: login, listing, downloads and folder lookups
+#Usage: python benchmarks/bench_batch.py [orders] [facets per mesh]
+import sys
+import tempfile
+import time
+
+import mockadsk
+from sandcastle import Sandcastle
+
+
+def launch(server, folder, app, answer):
+    # One launch of the script, answering its order prompt with answer
+    app.userInterface.answer = answer
+    mockadsk.loadFileCreator(folder, server.config(), app)
+
+
+def run(orders, facetCount, batches):
+    # A fresh stand-in and folder for each mode, since imported files leave the queue. Returns the
+    # orders imported, the stand-in's counters and the app's calls for the launches in batches
+    with tempfile.TemporaryDirectory() as folder, Sandcastle(orders * 2, facetCount, latency=0.02, handshake=0.03) as server:
+        app = mockadsk.MockApplication(latency=0.02)
+        orderIDs = [str(file["order"]["id"]) for file in list(server.files.values())[:orders]]
+
+        # An order that isn't queued downloads every file once and warms the order index, so both
+        # modes only download what they import
+        launch(server, folder, app, "0")
+        counters, calls, logs = dict(server.counters), dict(app.calls), len(app.logs)
+
+        start = time.perf_counter()
+        for batch in batches(orderIDs):
+            launch(server, folder, app, ", ".join(batch))
+        elapsed = time.perf_counter() - start
+
+        imported = sum(message.startswith("Order ") and message.endswith("imported and fit") for message in app.logs[logs:])
+        added = {name: count - counters[name] for name, count in server.counters.items()}
+        listings = sum(app.calls.get(name, 0) - calls.get(name, 0) for name in ("dataFolders", "dataFiles"))
+        return imported, added, listings, elapsed
+
+
+def main(orders, facetCount):
+    print(f"{'run':>10} {'imported':>9} {'logins':>7} {'requests':>9} {'listings':>9} {'seconds':>8}")
+    for label, batches in (("per order", lambda orderIDs: [[orderID] for orderID in orderIDs]), ("batch", lambda orderIDs: [orderIDs])):
+        imported, counters, listings, elapsed = run(orders, facetCount, batches)
+        if imported != orders:
+            raise Exception(f"{label}: imported {imported} of {orders} orders")
+        print(f"{label:>10} {imported:>9} {counters['logins']:>7} {counters['requests']:>9} {listings:>9} {elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
@@ -0,0 +1,64 @@
+#Decimates closed, noisy leg shaped meshes to a triangle budget: time, how far the vertices moved
+#and whether the bounding box held
+#Usage: python benchmarks/bench_decimate.py [facet count] [budget] [max deviation mm]
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import IndexedMesh
+
+np = IndexedMesh.np
+
+
+def legSoup(facetCount, seed=0):
+    #Triangle soup of a capped tube with scanner noise, about facetCount facets, like legStl but
+    #built with numpy so a million facets doesn't take minutes
+    rng = np.random.default_rng(seed)
+    segments = max(int(math.sqrt(facetCount / 2 / 3)), 3)
+    rings = max(facetCount // (2 * segments), 2)
+    theta = 2 * np.pi * np.arange(segments) / segments
+    z = np.linspace(0, 400, rings)
+    radius = (1 + 0.1 * np.sin(z / 60))[:, None] + rng.normal(0, 0.002, (rings, segments))
+    grid = np.stack([60 * radius * np.cos(theta), 45 * radius * np.sin(theta), np.broadcast_to(z[:, None], (rings, segments))], axis=-1)
+
+    ring, segment = np.meshgrid(np.arange(rings - 1), np.arange(segments), indexing="ij")
+    a = ring * segments + segment
+    b = ring * segments + (segment + 1) % segments
+    c, d = b + segments, a + segments
+    quads = np.stack([np.stack([a, b, c], -1), np.stack([a, c, d], -1)], axis=2).reshape(-1, 3)
+
+    points = np.concatenate([grid.reshape(-1, 3), [[0, 0, 0], [0, 0, 400]]])
+    bottom, top = len(points) - 2, len(points) - 1
+    s = np.arange(segments)
+    caps = np.concatenate([
+        np.stack([np.full(segments, bottom), (s + 1) % segments, s], -1),
+        np.stack([np.full(segments, top), (rings - 1) * segments + s, (rings - 1) * segments + (s + 1) % segments], -1)])
+    return points[np.concatenate([quads, caps])].astype(np.float32).ravel()
+
+
+def main(facetCount, budget, maxDeviation):
+    if np is None:
+        print("decimation needs numpy")
+        return
+
+    soup = legSoup(facetCount)
+    mesh = IndexedMesh.indexMesh(soup)
+    print(f"{'facets':>9} {'budget':>8} {'max dev':>8} {'index s':>8} {'decimate s':>10} {'triangles':>10} {'max err':>8} {'mean err':>9} {'bbox':>5}")
+    for deviation in (None, maxDeviation):
+        start = time.perf_counter()
+        decimated = IndexedMesh.decimate(mesh, budget, deviation)
+        elapsed = time.perf_counter() - start
+        before = mesh.vertices.reshape(-1, 3)
+        after = decimated.vertices.reshape(-1, 3)
+        bbox = np.array_equal(before.min(0), after.min(0)) and np.array_equal(before.max(0), after.max(0))
+        print(f"{mesh.triangleCount:>9} {budget:>8} {str(deviation):>8} {mesh.seconds:>8.3f} {elapsed:>10.3f} {decimated.triangleCount:>10}"
+              f" {decimated.maxError:>8.3f} {decimated.meanError:>9.3f} {'same' if bbox else 'moved':>5}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100_000,
+         float(sys.argv[3]) if len(sys.argv) > 3 else 1.0)
@@ -0,0 +1,62 @@
+#Recomputes per fit when File_Creator runs the same batch with compute on, with deferCompute turning
+#the design's compute off for the whole of fitFrame, and with deferCompute on designs that can't
+#defer. The script's own fitFrame runs, through mockadsk.loadFileCreator against the local stand-in
+#server. Checks the fitted sketches come out the same every way, and that a fit that raises partway
+#through still turns compute back on
+#Usage: python benchmarks/bench_deferred_compute.py [file count]
+import sys
+import tempfile
+
+import mockadsk
+from sandcastle import Sandcastle
+
+
+def run(fileCount, supportsDeferral=True, brokenFile=None, **flags):
+    # A fresh stand-in and folder each time, so every run fits the same files from the same starters.
+    # brokenFile's wireframe is missing a point, so its fit raises once compute is already deferred
+    app = mockadsk.MockApplication(answer="open")
+    openStarter = app.documents.open
+
+    def openDocument(dataFile, visible=True):
+        doc = openStarter(dataFile, visible)
+        doc.design.supportsDeferral = supportsDeferral
+        return doc
+
+    app.documents.open = openDocument
+    with tempfile.TemporaryDirectory() as folder, Sandcastle(fileCount, 200) as server:
+        if brokenFile is not None:
+            del server.files[brokenFile]["wireframe"]["botCuffPos"]
+        config = server.config()
+        config.update(batchRailMoves=False, **flags)
+        mockadsk.loadFileCreator(folder, config, app)
+    return app
+
+
+def main(fileCount):
+    runs = {
+        "compute on": run(fileCount, deferCompute=False),
+        "deferred": run(fileCount, deferCompute=True),
+        "deferred, no support": run(fileCount, supportsDeferral=False, deferCompute=True),
+    }
+
+    print(f"{'run':>22} {'recomputes':>11}  per fit")
+    expected = [mockadsk.sketchGeometry(doc) for doc in runs["compute on"].documents.opened]
+    for label, app in runs.items():
+        fits = len(app.documents.opened)
+        if fits != fileCount:
+            raise Exception(f"{label}: expected {fileCount} fits, got {fits}")
+        if [mockadsk.sketchGeometry(doc) for doc in app.documents.opened] != expected:
+            raise Exception(f"{label}: fitted geometry differs from the run with compute on")
+        print(f"{label:>22} {app.calls.get('recompute', 0) // fits:>11}")
+
+    # A fit that raises partway through still turns compute back on
+    app = run(fileCount, brokenFile=2, deferCompute=True)
+    if any(doc.design.deferred for doc in app.documents.opened):
+        raise Exception("Compute was left deferred after a failed fit")
+    if not any("fit failed" in message for message in app.logs):
+        raise Exception("The broken wireframe's fit didn't fail")
+    print("restore checks passed")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,51 @@
+#Time for Fitting's --dry-run to plan a batch of saved builder files, with a tenth of them KAFOs,
+#against random starter anchors
+#Usage: python benchmarks/bench_dry_run.py [builder files]
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Fitting
+import synthetic
+
+
+def main(fileCount):
+    rng = random.Random(0)
+    anchors = {
+        starter: {str(i): [rng.uniform(-20, 20) for _ in range(3)] for i in Fitting.ANCHORS}
+        for starter in ("A3_Base_File", "A3_Rigid_Base_File")
+    }
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        tempDir = Path(tempDir)
+        payloads = [synthetic.builderFile(fileId, 1000 + fileId, 1, seed=fileId, kafo=fileId % 10 == 0) for fileId in range(1, fileCount + 1)]
+        for payload in payloads:
+            payload["mesh"] = {"key": None}
+        with open(tempDir / "builderFiles.json", "w") as f:
+            json.dump(payloads, f)
+        with open(tempDir / "anchors.json", "w") as f:
+            json.dump(anchors, f)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            status = Fitting.main(["--dry-run", "--anchors", str(tempDir / "anchors.json"), "--output", str(tempDir / "plans.json"), str(tempDir / "builderFiles.json")])
+        elapsed = time.perf_counter() - start
+
+        with open(tempDir / "plans.json", "r") as f:
+            plans = json.load(f)
+
+    fitted = [plan for plan in plans if plan["plan"] is not None]
+    shortened = sum(plan["plan"]["shorten"] is not None for plan in fitted)
+    print(f"{len(plans)} builder files, {len(fitted)} planned, {shortened} shortened, exit {status}")
+    print(f"{elapsed:.3f} s, {elapsed / len(plans) * 1e6:.0f} us per file including JSON in and out")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
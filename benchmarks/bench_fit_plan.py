@@ -0,0 +1,53 @@
+#Checks Fitting.planTransforms against the way csMover used to work out each move, on random cross
+#section positions, and counts the sketch lookups and geometry reads each way needs
+#Usage: python benchmarks/bench_fit_plan.py [trials]
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Fitting
+
+
+def sequential(positions, fitPts, reads):
+    # csMover as it was: every call reads CS-i, CS-1, CS-13 and CS-10 where they are at that moment,
+    # then moves CS-i
+    positions = dict(positions)
+    translations = []
+    for i in Fitting.MOVE_ORDER:
+        csPt, cs1Pt, cs13Pt, cs10Pt = (positions[n] for n in (i, 1, 13, 10))
+        reads[0] += 4
+        fitPt = fitPts[i-1]
+        fromPt = cs1Pt if (2 <= i <= 3 or 23 <= i <= 24) else cs13Pt if (11 <= i <= 12 or 14 <= i <= 15) else csPt
+        dX, dY = fitPt[0] - fromPt[0], fitPt[1] - fromPt[1]
+        zShift = fitPts[9][2] - cs10Pt[2]
+        a = 0.92 if (1 <= i <= 3 or 23 <= i <= 24) else -0.92 if 11 <= i <= 15 else 0
+        if 4 <= i <= 10:
+            translation = (dX, dY, zShift) if 6 <= i <= 8 else (dX, 0, zShift)
+        elif 18 <= i <= 20:
+            translation = (dX, dY, 0)
+        else:
+            translation = (dX + a, 0, 0)
+        translations.append((i, translation))
+        positions[i] = tuple(p + t for p, t in zip(positions[i], translation))
+    return translations
+
+
+def main(trials):
+    rng = random.Random(0)
+    mismatches = 0
+    sequentialReads = [0]
+    for _ in range(trials):
+        positions = {i: tuple(rng.uniform(-20, 20) for _ in range(3)) for i in range(1, 25)}
+        fitPts = [tuple(rng.uniform(-20, 20) for _ in range(3)) for _ in range(24)]
+        anchors = {i: positions[i] for i in Fitting.ANCHORS}
+        if Fitting.planTransforms(anchors, fitPts) != sequential(positions, fitPts, sequentialReads):
+            mismatches += 1
+
+    print(f"{trials} fits, {mismatches} mismatches")
+    print(f"cross section reads per fit: {sequentialReads[0] // trials} one at a time, {len(Fitting.ANCHORS)} planned")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
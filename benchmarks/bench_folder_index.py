@@ -0,0 +1,75 @@
+#Folder listings and time to resolve file_copy's starter file and target folder for a batch of
+#orders, scanning the folders every time versus going through FolderIndex, on a mock folder tree.
+#Also checks that a folder added mid-session is picked up and that a ttl forces a refresh
+#Usage: python benchmarks/bench_folder_index.py [orders] [seconds per listing]
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import FolderIndex
+import mockfusion
+
+
+def scan(root, month):
+    # What file_copy did before FolderIndex
+    for folder in root.dataFolders:
+        if folder.name == "2024 Patient Files":
+            patientFilesFolder = folder
+        elif folder.name == "Ascender Fitment Starters":
+            starterFileFolder = folder
+        elif folder.name == "KAFO":
+            kafoFolder = folder
+    for file in starterFileFolder.dataFiles:
+        if file.name == "A3_Base_File":
+            starter = file
+    for folder in kafoFolder.dataFolders:
+        if folder.name == "KAFO Starter Files":
+            kafoStarters = folder
+    for file in kafoStarters.dataFiles:
+        pass
+    for folder in patientFilesFolder.dataFolders:
+        if folder.name == month:
+            target = folder
+    return starter, target
+
+
+def indexed(index, month):
+    return index.file("Ascender Fitment Starters", "A3_Base_File"), index.folder("2024 Patient Files", month)
+
+
+def main(orders, latency):
+    print(f"{'run':>8} {'listings':>9} {'seconds':>8}")
+    calls = {}
+    root = mockfusion.productionFolder(latency, calls)
+    index = FolderIndex.FolderIndex(lambda: root)
+
+    for label, resolve in (("scan", lambda: scan(root, "June")), ("index", lambda: indexed(index, "June"))):
+        calls.clear()
+        start = time.perf_counter()
+        results = [resolve() for _ in range(orders)]
+        elapsed = time.perf_counter() - start
+        assert all(result == results[0] for result in results)
+        print(f"{label:>8} {sum(calls.values()):>9} {elapsed:>8.3f}")
+
+    assert indexed(index, "June") == scan(root, "June")
+
+    # A folder created after the index was built is found by relisting just its parent
+    calls.clear()
+    newFolder = root.folders[0].addFolder("Extra")
+    assert index.folder("2024 Patient Files", "Extra") is newFolder
+    assert sum(calls.values()) == 1
+
+    # With a ttl, a stale listing is refreshed on its next use
+    ttlIndex = FolderIndex.FolderIndex(lambda: root, ttl=0.05)
+    starter = ttlIndex.file("Ascender Fitment Starters", "A3_Base_File")
+    root.folders[1].files[1] = replacement = mockfusion.MockDataFile("A3_Base_File")
+    assert ttlIndex.file("Ascender Fitment Starters", "A3_Base_File") is starter
+    time.sleep(0.06)
+    assert ttlIndex.file("Ascender Fitment Starters", "A3_Base_File") is replacement
+    print("invalidation checks passed")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, float(sys.argv[2]) if len(sys.argv) > 2 else 0.02)
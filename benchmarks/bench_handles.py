@@ -0,0 +1,76 @@
+#Fusion lookups for the sketches, fit points and hinges of one fitFrame, looking each up every time
+#like the movers used to versus through Handles.DocumentHandles. fitFrame is the script's own, loaded
+#through mockadsk.loadFileCreator, and fits a synthetic wireframe into a mock starter document each
+#way, once with csMover moving the rails and once with rail_mover
+#Usage: python benchmarks/bench_handles.py
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Handles
+import mockadsk
+import mockfusion
+import synthetic
+
+#Calls that look something up in Fusion, as the mocks count them
+LOOKUPS = ("sketches.itemByName", "sketchFittedSplines.item", "fitPoints.item", "occurrences.itemByName")
+
+
+class Direct:
+    # Looks everything up again on every call, like the movers did before DocumentHandles
+
+    def __init__(self, root):
+        self.root = root
+
+    def sketch(self, name):
+        return self.root.sketches.itemByName(name)
+
+    def fitPoints(self, name):
+        return self.sketch(name).sketchCurves.sketchFittedSplines.item(0).fitPoints
+
+    def fitPoint(self, name, i):
+        return self.fitPoints(name).item(i)
+
+    def occurrence(self, name):
+        return self.root.occurrences.itemByName(name)
+
+
+def fit(fileCreator, makeHandles, batchRailMoves):
+    # One fitFrame on a fresh starter document, with fileCreator's handles swapped for makeHandles.
+    # Returns the lookups it made by kind
+    calls = mockadsk.Calls()
+    doc = mockadsk.MockDocument(None, calls)
+    fileCreator.Handles.DocumentHandles = makeHandles
+    fileCreator.api.batchRailMoves = batchRailMoves
+    fileCreator.fitFrame(None, synthetic.wireframe(seed=1), False, doc=doc)
+    return {name: calls[name] for name in LOOKUPS if name in calls}
+
+
+def main():
+    # Cancelling the order prompt loads the script without importing anything
+    config = {"isProd": False, "api": {"url": "127.0.0.1:9", "email": "bench@example.com", "password": "bench", "tokenCache": None}}
+    with tempfile.TemporaryDirectory() as folder:
+        fileCreator = mockadsk.loadFileCreator(folder, config, mockadsk.MockApplication(answer=None))
+        documentHandles = fileCreator.Handles.DocumentHandles
+
+        print(f"{'run':>8} {'rails':>11} {'lookups':>8}  by kind")
+        for batchRailMoves in (False, True):
+            for label, makeHandles in (("direct", Direct), ("handles", documentHandles)):
+                lookups = fit(fileCreator, makeHandles, batchRailMoves)
+                print(f"{label:>8} {'rail_mover' if batchRailMoves else 'csMover':>11} {sum(lookups.values()):>8}  {lookups}")
+
+    # A handle that stops being valid is looked up again
+    calls = {}
+    handles = Handles.DocumentHandles(mockfusion.starterRoot(calls))
+    sketch = handles.sketch("CS-1")
+    sketch.isValid = False
+    before = handles.lookups
+    handles.sketch("CS-1")
+    assert handles.lookups == before + 1
+    print("invalidation check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#Triangle soup from parseStl versus the indexed mesh built from it, on closed leg shaped meshes:
+#how many vertices were merged, how long it took and how much less gets handed to Fusion. Coordinates
+#compares the soup's 9 floats per facet with the shared vertex buffer, total adds the normals and,
+#for the indexed mesh, the triangle indices
+#Usage: python benchmarks/bench_indexed_mesh.py [ring count] [segments per ring] [tolerance mm]
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import IndexedMesh
+from Stl import parseStl
+from synthetic import legStl
+
+
+def main(rings, segments, tolerance):
+    meshName, coordinates, normalVectors = parseStl(legStl(rings, segments))
+    soupBytes = (len(coordinates) + len(normalVectors)) * 4
+    print(f"{'path':>7} {'tolerance':>9} {'triangles':>10} {'vertices':>9} {'dedup':>6} {'seconds':>8}"
+          f" {'coords MB':>10} {'smaller':>8} {'total MB':>9} {'smaller':>8}")
+    for vectorized in (True, False):
+        if vectorized and IndexedMesh.np is None:
+            continue
+        for tol in (None, tolerance):
+            mesh = IndexedMesh.indexMesh(coordinates, normalVectors, tol, vectorized)
+            label = "numpy" if vectorized else "python"
+            vertexBytes = len(mesh.vertices) * 4
+            print(f"{label:>7} {str(tol):>9} {mesh.triangleCount:>10} {mesh.vertexCount:>9} {mesh.dedupRatio:>5.2f}x {mesh.seconds:>8.3f}"
+                  f" {vertexBytes / 1e6:>10.2f} {len(coordinates) * 4 / vertexBytes:>7.2f}x"
+                  f" {mesh.nbytes / 1e6:>9.2f} {soupBytes / mesh.nbytes:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 250,
+         float(sys.argv[3]) if len(sys.argv) > 3 else 0.01)
@@ -0,0 +1,59 @@
+#Bytes spent polling /api/fusionFile/all against the local stand-in server: downloading the whole
+#listing every poll, versus ListingCache with conditional requests, with and without the server's
+#changed-since cursor. Every few polls a file is added to the queue and another one removed, and the
+#cached listing is checked against the server's after every poll
+#Usage: python benchmarks/bench_listing.py [queue size] [polls] [polls between changes]
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+from ListingCache import ListingCache
+from sandcastle import Sandcastle
+
+
+def poll(fileCount, polls, every, incremental, cached):
+    with Sandcastle(fileCount, facetCount=1, incremental=incremental) as server, tempfile.TemporaryDirectory() as folder:
+        api = Api.Api(server.config())
+        listings = ListingCache(Path(folder) / "listingCache.json")
+        received = 0
+        totals = {}
+        nextId = fileCount + 1
+        for i in range(polls):
+            if i and i % every == 0:
+                server.touch(nextId)
+                server.remove(nextId - fileCount)
+                nextId += 1
+
+            response = listings.get(api, "/api/fusionFile/all") if cached else api.get("/api/fusionFile/all")
+            received += response.size
+            expected = sorted(map(str, server.listing()))
+            if response.status != 200 or sorted(map(str, response.data)) != expected:
+                raise Exception(f"Listing differs from the server's after poll {i}")
+
+            # Each poll stands in for a new run, which loads the cache from disk
+            if cached:
+                listings.save()
+                for name, value in listings.stats().items():
+                    totals[name] = totals.get(name, 0) + value
+                listings = ListingCache(listings.path)
+        api.close()
+        return received, totals
+
+
+def main(fileCount, polls, every):
+    print(f"{'run':>22} {'KB received':>12} {'full':>5} {'304':>5} {'changes':>8} {'KB saved':>9}")
+    plain, _ = poll(fileCount, polls, every, False, False)
+    print(f"{'plain GET':>22} {plain / 1e3:>12.1f} {polls:>5} {0:>5} {0:>8} {0:>9.1f}")
+    for label, incremental in (("ETag, full on change", False), ("ETag + changedSince", True)):
+        received, stats = poll(fileCount, polls, every, incremental, True)
+        print(f"{label:>22} {received / 1e3:>12.1f} {stats['full']:>5} {stats['notModified']:>5} {stats['changes']:>8}"
+              f" {(plain - received) / 1e3:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 60,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 10)
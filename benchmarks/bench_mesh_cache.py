@@ -0,0 +1,56 @@
+#Bytes and time for File_Creator to get every builder file, cold versus out of MeshCache on a rerun
+#after a crash, against the local stand-in server with Fusion mocked by mockadsk. The stand-in keeps
+#files queued when they're deleted, like a run that went down before it got that far, and the rerun
+#also loses the fit index so every file is parsed and fit again. Then one file's wireframe changes on
+#the server, and the run after that has to download it again and fit the new wireframe rather than
+#reuse the cached payload
+#Usage: python benchmarks/bench_mesh_cache.py [file count] [facets per mesh]
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import mockadsk
+import synthetic
+from sandcastle import Sandcastle
+
+
+def run(server, folder, app):
+    sentBefore, notModifiedBefore = server.counters["bytesSent"], server.counters["notModified"]
+    start = time.perf_counter()
+    mockadsk.loadFileCreator(folder, dict(server.config(), indexMesh=False), app)
+    elapsed = time.perf_counter() - start
+    with open(sorted((Path(folder) / "filecreator" / "reports").glob("run-*.json"))[-1]) as f:
+        report = json.load(f)
+    # Report file names only go down to the second
+    time.sleep(1)
+    return report, server.counters["bytesSent"] - sentBefore, server.counters["notModified"] - notModifiedBefore, elapsed
+
+
+def main(fileCount, facetCount):
+    print(f"{'run':>10} {'MB sent':>8} {'304s':>5} {'seconds':>8}  cache")
+    with tempfile.TemporaryDirectory() as folder, Sandcastle(fileCount, facetCount, latency=0.02, keep=True, shared=True) as server:
+        app = mockadsk.MockApplication(answer="open")
+        package = Path(folder) / "filecreator"
+
+        for label in ("cold", "rerun", "changed"):
+            if label == "rerun":
+                (package / "fitIndex.json").unlink()
+            if label == "changed":
+                server.touch(2)
+                server.files[2]["wireframe"] = synthetic.wireframe(seed=1000)
+
+            report, sent, notModified, elapsed = run(server, folder, app)
+            print(f"{label:>10} {sent / 1e6:>8.2f} {notModified:>5} {elapsed:>8.3f}  {report['cache']}")
+
+        # The changed file has to come from the server, not the cache, and be fit again
+        results = report["orders"][str(server.files[2]["order"]["id"])]["results"]
+        with open(package / "cache" / "file-2.json") as f:
+            cachedWireframe = json.load(f)["wireframe"]
+        if notModified != fileCount - 1 or not results[0].endswith("imported and fit") or cachedWireframe != server.files[2]["wireframe"]:
+            raise Exception(f"Changed builder file was served from the cache: {results}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
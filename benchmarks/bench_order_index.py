@@ -0,0 +1,54 @@
+#Bytes and time to pull one order's builder files out of the queue, downloading every file versus
+#going through OrderIndex, against the local stand-in server
+#Usage: python benchmarks/bench_order_index.py [file count] [facets per mesh]
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+import OrderIndex
+from sandcastle import Sandcastle
+
+
+def findOrder(api, orderID, index=None):
+    files = api.get("/api/fusionFile/all").data
+    wanted = files
+    if index is not None:
+        index.prune(files)
+        matches, unknown = index.plan(files, orderID)
+        wanted = matches + unknown
+
+    found = []
+    for file, response in zip(wanted, api.getMany(f"/api/fusionFile/{file['id']}" for file in wanted)):
+        if index is not None:
+            index.record(file["id"], response.data["order"]["id"])
+        if str(response.data["order"]["id"]) == orderID:
+            found.append(file["id"])
+    if index is not None:
+        index.save()
+    return found
+
+
+def main(fileCount, facetCount):
+    print(f"{'run':>18} {'found':>6} {'MB sent':>8} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tempDir, Sandcastle(fileCount, facetCount, latency=0.02) as server:
+        api = Api.Api(server.config())
+        orderID = str(server.files[fileCount // 2]["order"]["id"])
+        runs = (("download all", None), ("index, first run", tempDir), ("index, rerun", tempDir))
+
+        for label, indexDir in runs:
+            index = OrderIndex.OrderIndex(Path(indexDir) / "orderIndex.json") if indexDir else None
+            sentBefore = server.counters["bytesSent"]
+            start = time.perf_counter()
+            found = findOrder(api, orderID, index)
+            elapsed = time.perf_counter() - start
+            sent = server.counters["bytesSent"] - sentBefore
+            print(f"{label:>18} {len(found):>6} {sent / 1e6:>8.2f} {elapsed:>8.3f}")
+        api.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50, int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
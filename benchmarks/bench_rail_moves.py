@@ -0,0 +1,52 @@
+#Runs the same batch through File_Creator with batchRailMoves off, where csMover moves the rail fit
+#points one cross section at a time, and on, where rail_mover makes them all at the end with each
+#rail's compute deferred. Both are the script's own code, run by mockadsk.loadFileCreator against the
+#local stand-in server. Checks every fitted document ends up with the same sketch geometry and counts
+#the sketch moves and recomputes per fit. deferCompute stays off so only the rail moves differ
+#Usage: python benchmarks/bench_rail_moves.py [file count]
+import math
+import sys
+import tempfile
+
+import mockadsk
+from sandcastle import Sandcastle
+
+
+def run(fileCount, **flags):
+    # A fresh stand-in and folder each time, so every run fits the same files from the same starters
+    app = mockadsk.MockApplication(answer="open")
+    with tempfile.TemporaryDirectory() as folder, Sandcastle(fileCount, 200) as server:
+        config = server.config()
+        config.update(deferCompute=False, **flags)
+        mockadsk.loadFileCreator(folder, config, app)
+    return app
+
+
+def sameGeometry(a, b):
+    # The batched moves add up the same translations in a different order
+    return a.keys() == b.keys() and all(
+        len(a[name]) == len(b[name]) and all(math.isclose(p, q, abs_tol=1e-9) for x, y in zip(a[name], b[name]) for p, q in zip(x, y))
+        for name in a
+    )
+
+
+def main(fileCount):
+    results = {label: run(fileCount, batchRailMoves=batchRailMoves) for label, batchRailMoves in (("per point", False), ("batched", True))}
+
+    perPoint, batched = results["per point"], results["batched"]
+    fits = len(perPoint.documents.opened)
+    if fits != fileCount or len(batched.documents.opened) != fits:
+        raise Exception(f"Expected {fileCount} fits, got {fits} and {len(batched.documents.opened)}")
+    mismatches = sum(not sameGeometry(mockadsk.sketchGeometry(a), mockadsk.sketchGeometry(b))
+                     for a, b in zip(perPoint.documents.opened, batched.documents.opened))
+
+    print(f"{fits} fits, {mismatches} with different sketch geometry")
+    print(f"{'run':>10} {'moves':>6} {'recomputes':>11}  per fit")
+    for label, app in results.items():
+        print(f"{label:>10} {app.calls.get('move', 0) // fits:>6} {app.calls.get('recompute', 0) // fits:>11}")
+    if mismatches:
+        raise Exception("Batched rail moves changed the fitted geometry")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,41 @@
+#Compares the vectorized and pure-Python .stl parsers on ascii and binary meshes
+#Usage: python benchmarks/bench_stl.py [facet counts...]
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Stl
+from synthetic import asciiStl, binaryStl
+
+
+def timeIt(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def compare(label, count, data, pythonParser, numpyParser):
+    pythonTime, expected = timeIt(pythonParser, data)
+    if not Stl.HAS_NUMPY:
+        print(f"{label:>7} {count:>10} {len(data) / 1e6:>8.1f} {pythonTime:>10.3f} {'n/a':>10} {'n/a':>8}")
+        return
+
+    numpyTime, result = timeIt(numpyParser, data)
+    if result is None or result[0] != expected[0] \
+            or result[1].tobytes() != expected[1].tobytes() \
+            or result[2].tobytes() != expected[2].tobytes():
+        raise Exception(f"Parsers disagree on {label} at {count} facets")
+    print(f"{label:>7} {count:>10} {len(data) / 1e6:>8.1f} {pythonTime:>10.3f} {numpyTime:>10.3f} {pythonTime / numpyTime:>7.1f}x")
+
+
+def main(counts):
+    print(f"{'format':>7} {'facets':>10} {'MB':>8} {'python s':>10} {'numpy s':>10} {'speedup':>8}")
+    for count in counts:
+        compare("ascii", count, asciiStl(count), Stl.parseAsciiPython, Stl.parseAsciiNumpy)
+        compare("binary", count, binaryStl(count), Stl.parseBinaryPython, Stl.parseBinaryNumpy)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,40 @@
+#How parseStlParallel scales with worker processes on a large ascii .stl, against parseStl on one
+#core. Every run is checked to come out identical to the serial parse
+#Usage: python benchmarks/bench_stl_parallel.py [facet count] [max workers]
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Stl
+from synthetic import asciiStl
+
+
+def main(facetCount, maxWorkers):
+    if not Stl.HAS_NUMPY:
+        print("parseStlParallel stays serial without numpy")
+        return
+
+    data = asciiStl(facetCount)
+    print(f"{len(data) / 1e6:.0f} MB, {facetCount} facets, {os.cpu_count()} cores, serial below {Stl.PARALLEL_THRESHOLD / 1e6:.0f} MB")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+
+    start = time.perf_counter()
+    expected = Stl.parseStl(data)
+    serial = time.perf_counter() - start
+    print(f"{'serial':>8} {serial:>8.3f} {1:>7.2f}x")
+
+    for workers in range(2, maxWorkers + 1):
+        start = time.perf_counter()
+        result = Stl.parseStlParallel(data, workers, threshold=0)
+        elapsed = time.perf_counter() - start
+        if result[0] != expected[0] or result[1].tobytes() != expected[1].tobytes() or result[2].tobytes() != expected[2].tobytes():
+            raise Exception(f"Parallel parse with {workers} workers differs from the serial one")
+        print(f"{workers:>8} {elapsed:>8.3f} {serial / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else max(os.cpu_count() or 1, 4))
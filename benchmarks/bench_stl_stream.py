@@ -0,0 +1,54 @@
+#Peak memory and wall time for parsing a whole .stl in one go versus streaming it through StlReader,
+#which is how parseStlFile reads the ascii files importMesh's file dialog picks
+#Usage: python benchmarks/bench_stl_stream.py [facet counts...]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Stl
+from synthetic import asciiStl
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def wholeFile(path):
+    with open(path, "rb") as f:
+        return Stl.parseStl(f.read())
+
+
+def streamed(path):
+    return Stl.parseStlFile(path)
+
+
+def main(counts):
+    print(f"{'facets':>10} {'file MB':>8} {'output MB':>10} {'mode':>7} {'seconds':>8} {'peak MB':>8} {'peak/out':>9}")
+    for count in counts:
+        with tempfile.NamedTemporaryFile(suffix=".stl", delete=False) as f:
+            f.write(asciiStl(count))
+        try:
+            outputSize = count * 12 * 4
+            for mode, parser in (("whole", wholeFile), ("stream", streamed)):
+                elapsed, peak, result = measure(lambda: parser(f.name))
+                if len(result[2]) != count * 3:
+                    raise Exception(f"{mode} parser lost facets at {count}")
+                print(f"{count:>10} {os.path.getsize(f.name) / 1e6:>8.1f} {outputSize / 1e6:>10.1f} {mode:>7} "
+                      f"{elapsed:>8.2f} {peak / 1e6:>8.1f} {peak / outputSize:>8.1f}x")
+        finally:
+            os.remove(f.name)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100_000, 800_000])
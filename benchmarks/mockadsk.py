@@ -0,0 +1,455 @@
+#Recording stand-in for the adsk.core and adsk.fusion modules, enough of them for File_Creator to
+#import and run a whole batch on plain Linux. install() puts the fake modules in sys.modules, after
+#which adsk.core.Application.get() returns a MockApplication. Every call that would go into Fusion
+#is counted in app.calls under a name like "documents.open" or "sketches.add". Cloud folders and
+#starter files come from mockfusion.productionFolder, and each opened starter gets the sketches
+#and hinges of mockfusion.starterRoot
+import importlib
+import json
+import shutil
+import sys
+import types
+from pathlib import Path
+
+import mockfusion
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+class Calls(dict):
+
+    def count(self, name, amount=1):
+        self[name] = self.get(name, 0) + amount
+
+
+class MockObjectCollection(list):
+
+    @classmethod
+    def create(cls):
+        return cls()
+
+    def add(self, item):
+        self.append(item)
+        return True
+
+
+class MockPoint3D(mockfusion.MockPoint):
+
+    @classmethod
+    def create(cls, x=0.0, y=0.0, z=0.0):
+        return cls(x, y, z)
+
+
+class MockVector3D(MockPoint3D):
+    pass
+
+
+class MockMatrix3D:
+
+    translation = None
+
+    @classmethod
+    def create(cls):
+        matrix = cls()
+        matrix.translation = MockVector3D(0.0, 0.0, 0.0)
+        return matrix
+
+
+class MockSketchLine:
+
+    isValid = True
+
+    def __init__(self, start):
+        self.startSketchPoint = mockfusion.MockSketchPoint(start)
+        self.point = start
+
+
+class MockSketchPoints(list):
+
+    def __init__(self, calls, points=()):
+        super().__init__(points)
+        self.calls = calls
+
+    def add(self, point):
+        self.calls.count("sketchPoints.add")
+        sketchPoint = mockfusion.MockSketchPoint((point.x, point.y, point.z))
+        self.append(sketchPoint)
+        return sketchPoint
+
+
+class MockSketchCurves(list):
+    # Iterates over every curve, with the fitted splines and lines also as their own collections
+
+    def __init__(self, splines, lines, calls):
+        super().__init__(splines + lines)
+        self.sketchFittedSplines = mockfusion.MockCollection(splines, calls, "sketchFittedSplines.item")
+        self.sketchLines = lines
+
+
+class MockSketch(mockfusion.MockSketch):
+    # mockfusion.MockSketch with Fusion's own move(ObjectCollection, Matrix3D), plus the curves and
+    # points csMover and shorten_frame walk through
+
+    def __init__(self, name, calls, pointCount=26, design=None):
+        super().__init__(name, calls, pointCount, design)
+        spline = self.sketchCurves.sketchFittedSplines.items[0]
+        lines = [MockSketchLine((0.0, 0.0, z)) for z in (5.0, 15.0)] if name == "Strap pos" else []
+        self.sketchCurves = MockSketchCurves([spline], lines, calls)
+        self.sketchPoints = MockSketchPoints(calls, [mockfusion.MockSketchPoint((0.0, 0.0, 0.0))])
+        self.isLightBulbOn = True
+
+    def move(self, group, transform):
+        translation = transform.translation
+        points = [item for item in group if hasattr(item, "point")]
+        super().move(points, (translation.x, translation.y, translation.z))
+
+
+class MockFeatures:
+
+    def __init__(self, calls, design):
+        self.calls = calls
+        self.design = design
+        self.moveFeatures = MockMoveFeatures(calls, design)
+        self.baseFeatures = MockBaseFeatures(calls, design)
+
+
+class MockMoveFeatures:
+
+    def __init__(self, calls, design):
+        self.calls = calls
+        self.design = design
+
+    def createInput(self, bodies, transform):
+        self.calls.count("moveFeatures.createInput")
+        return (list(bodies), transform)
+
+    def add(self, moveInput):
+        self.calls.count("moveFeatures.add")
+        self.design.edit()
+        return moveInput
+
+
+class MockBaseFeature:
+
+    def __init__(self, calls, design):
+        self.calls = calls
+        self.design = design
+
+    def startEdit(self):
+        self.calls.count("baseFeature.startEdit")
+
+    def finishEdit(self):
+        self.calls.count("baseFeature.finishEdit")
+        self.design.edit()
+
+
+class MockBaseFeatures:
+
+    def __init__(self, calls, design):
+        self.calls = calls
+        self.design = design
+
+    def add(self):
+        self.calls.count("baseFeatures.add")
+        return MockBaseFeature(self.calls, self.design)
+
+
+class MockMeshBodies(list):
+
+    def __init__(self, calls):
+        super().__init__()
+        self.calls = calls
+
+    def addByTriangleMeshData(self, coordinates, triangleIndexList, normalVectors, normalIndexList):
+        # Counts the floats and indices handed over, that's what Fusion has to take in. Raises when
+        # the lists don't line up: without index lists every three vertices are a triangle and each
+        # vertex has its own normal, with them each corner has a vertex and a normal index
+        self.calls.count("meshBodies.addByTriangleMeshData")
+        vertexCount, normalCount = len(coordinates) // 3, len(normalVectors) // 3
+        if len(coordinates) % 3 or len(normalVectors) % 3:
+            raise Exception("Coordinates and normals must come in threes")
+        if not triangleIndexList:
+            if vertexCount % 3 or normalIndexList or (normalVectors and normalCount != vertexCount):
+                raise Exception(f"{vertexCount} vertices without an index list need as many normals, got {normalCount}")
+        else:
+            if len(triangleIndexList) % 3 or max(triangleIndexList) >= vertexCount:
+                raise Exception("Triangle indices don't match the vertices")
+            if normalVectors and (len(normalIndexList) != len(triangleIndexList) or max(normalIndexList) >= normalCount):
+                raise Exception("Normal indices don't match the normals")
+        self.calls.count("meshBodies.values", len(coordinates) + len(triangleIndexList) + len(normalVectors) + len(normalIndexList))
+        body = types.SimpleNamespace(name=f"Mesh{len(self) + 1}", isValid=True)
+        self.append(body)
+        return body
+
+    def item(self, i):
+        return self[i]
+
+
+class MockHingeOccurrence(mockfusion.MockOccurrence):
+
+    def __init__(self, name, calls, design):
+        super().__init__(name)
+        self.component = types.SimpleNamespace(features=MockFeatures(calls, design), bRepBodies=[types.SimpleNamespace(name="Body1")])
+
+
+class MockSketches(mockfusion.MockCollection):
+
+    def __init__(self, items, calls, design):
+        super().__init__(items, calls, "sketches.itemByName")
+        self.design = design
+
+    def add(self, plane):
+        self.calls.count("sketches.add")
+        sketch = MockSketch(f"Sketch{len(self.items) + 1}", self.calls, 0, self.design)
+        self.items.append(sketch)
+        return sketch
+
+
+class MockAttributes:
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.values = {}
+
+    def add(self, groupName, name, value):
+        self.calls.count("attributes.add")
+        self.values[(groupName, name)] = value
+        return types.SimpleNamespace(groupName=groupName, name=name, value=value)
+
+    def itemByName(self, groupName, name):
+        self.calls.count("attributes.itemByName")
+        if (groupName, name) not in self.values:
+            return None
+        return types.SimpleNamespace(groupName=groupName, name=name, value=self.values[(groupName, name)])
+
+
+class MockDesign(mockfusion.MockDesign):
+    # A starter file's design: the sketches and hinges of mockfusion.starterRoot with Fusion's own
+    # call signatures, plus the features, mesh bodies and attributes fitFrame adds
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.supportsDeferral = True
+        self.deferred = False
+        names = [sketch.name for sketch in mockfusion.starterRoot({}).sketches]
+        root = types.SimpleNamespace(name="Root")
+        root.sketches = MockSketches([MockSketch(name, calls, 26, self) for name in names], calls, self)
+        root.occurrences = mockfusion.MockCollection([MockHingeOccurrence(name, calls, self) for name in ("LateralHinge:1", "MedialHinge:1")],
+                                                     calls, "occurrences.itemByName")
+        root.features = MockFeatures(calls, self)
+        root.meshBodies = MockMeshBodies(calls)
+        root.xYConstructionPlane = types.SimpleNamespace(name="XY")
+        self.rootComponent = root
+        self.attributes = MockAttributes(calls)
+        self.exportManager = MockExportManager(calls)
+
+
+class MockExportManager:
+    # Writes a placeholder archive where the real one would go. Like Fusion, adds .f3d to a filename
+    # that doesn't already end in it
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def createFusionArchiveExportOptions(self, filename):
+        return types.SimpleNamespace(filename=filename)
+
+    def execute(self, options):
+        self.calls.count("exportManager.execute")
+        filename = options.filename if options.filename.lower().endswith(".f3d") else options.filename + ".f3d"
+        with open(filename, "wb") as f:
+            f.write(b"mock f3d")
+        return True
+
+
+class MockImportManager:
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def createFusionArchiveImportOptions(self, filename):
+        return types.SimpleNamespace(filename=filename)
+
+    def importToNewDocument(self, options):
+        self.calls.count("importManager.importToNewDocument")
+        with open(options.filename, "rb"):
+            pass
+        return MockDocument(None, self.calls)
+
+
+class MockDocument:
+
+    def __init__(self, dataFile, calls):
+        self.dataFile = dataFile
+        self.calls = calls
+        self.design = MockDesign(calls)
+        self.products = types.SimpleNamespace(itemByProductType=lambda productType: self.design)
+        self.saves = []
+
+    def save(self, description):
+        self.calls.count("document.save")
+        self.saves.append(description)
+        return True
+
+    def saveAs(self, name, folder, description, tag):
+        # A new file in folder, which is what the document's dataFile is from then on
+        self.calls.count("document.saveAs")
+        self.saves.append(description)
+        self.dataFile = folder.addFile(name)
+        return True
+
+    def close(self, saveChanges=False):
+        self.calls.count("document.close")
+        return True
+
+
+class MockDocuments:
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.opened = []
+
+    def open(self, dataFile, visible=True):
+        self.calls.count("documents.open")
+        doc = MockDocument(dataFile, self.calls)
+        self.opened.append(doc)
+        return doc
+
+
+class MockData:
+
+    def __init__(self, calls, latency=0.0):
+        self.calls = calls
+        self.production = mockfusion.productionFolder(latency, calls)
+
+    def findFolderById(self, folderId):
+        self.calls.count("data.findFolderById")
+        return self.production
+
+    def findFileById(self, fileId):
+        self.calls.count("data.findFileById")
+        folders = [self.production]
+        while folders:
+            folder = folders.pop()
+            folders.extend(folder.folders)
+            for file in folder.files:
+                if file.id == fileId:
+                    return file
+        return None
+
+
+class MockFileDialog:
+
+    isMultiSelectEnabled = False
+    title = ""
+    filter = ""
+    filenames = []
+
+    def showOpen(self):
+        return DialogResults.DialogOK if self.filenames else DialogResults.DialogCancel
+
+
+class MockUserInterface:
+    # inputBox answers with answer, or as cancelled when it is None
+
+    def __init__(self, calls, answer=None, filenames=()):
+        self.calls = calls
+        self.answer = answer
+        self.filenames = list(filenames)
+        self.messages = []
+
+    def inputBox(self, prompt, title="", defaultValue=""):
+        self.calls.count("ui.inputBox")
+        return ("", True) if self.answer is None else (self.answer, False)
+
+    def messageBox(self, text, title="", *args):
+        self.calls.count("ui.messageBox")
+        self.messages.append(text)
+
+    def createFileDialog(self):
+        dialog = MockFileDialog()
+        dialog.filenames = self.filenames
+        return dialog
+
+
+class MockApplication:
+
+    current = None
+
+    def __init__(self, answer=None, latency=0.0):
+        self.calls = Calls()
+        self.logs = []
+        self.userInterface = MockUserInterface(self.calls, answer)
+        self.data = MockData(self.calls, latency)
+        self.documents = MockDocuments(self.calls)
+        self.importManager = MockImportManager(self.calls)
+        self.activeProduct = MockDesign(self.calls)
+
+    @classmethod
+    def get(cls):
+        return cls.current
+
+    def log(self, message, *args):
+        self.logs.append(message)
+
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+
+
+class MeshUnits:
+    MillimeterMeshUnit = 1
+
+
+def sketchGeometry(doc):
+    #Where every fit point, line and sketch point in doc's design ended up, {sketch name: [(x, y, z)]},
+    #for comparing what two runs of the script left behind
+    geometry = {}
+    for sketch in doc.design.rootComponent.sketches:
+        points = [point.point for spline in sketch.sketchCurves.sketchFittedSplines for point in spline.fitPoints]
+        points += [curve.point for curve in sketch.sketchCurves if hasattr(curve, "point")]
+        points += [point.point for point in sketch.sketchPoints]
+        geometry[sketch.name] = points
+    return geometry
+
+
+def install(app):
+    #Makes `import adsk.core, adsk.fusion` give these stand-ins, with Application.get() returning app
+    MockApplication.current = app
+    adsk = types.ModuleType("adsk")
+    core = types.ModuleType("adsk.core")
+    fusion = types.ModuleType("adsk.fusion")
+    core.Application = MockApplication
+    core.ObjectCollection = MockObjectCollection
+    core.Point3D = MockPoint3D
+    core.Vector3D = MockVector3D
+    core.Matrix3D = MockMatrix3D
+    core.DialogResults = DialogResults
+    fusion.Design = MockDesign
+    fusion.MeshUnits = MeshUnits
+    adsk.core, adsk.fusion = core, fusion
+    sys.modules.update({"adsk": adsk, "adsk.core": core, "adsk.fusion": fusion})
+    return app
+
+
+def loadFileCreator(folder, config, app, package="filecreator"):
+    #Copies the script's modules into folder/package next to config as its config2.json and imports
+    #File_Creator from there, which runs execute() against app the way Fusion runs the script. The
+    #caches, indexes and run report it writes all land in that folder. Returns the module
+    packagePath = Path(folder) / package
+    packagePath.mkdir(parents=True, exist_ok=True)
+    for source in REPO.glob("*.py"):
+        shutil.copy(source, packagePath / source.name)
+    (packagePath / "__init__.py").touch()
+    with open(packagePath / "config2.json", "w") as f:
+        json.dump(config, f)
+
+    install(app)
+    for name in [name for name in sys.modules if name == package or name.startswith(package + ".")]:
+        del sys.modules[name]
+    sys.path.insert(0, str(folder))
+    try:
+        return importlib.import_module(f"{package}.File_Creator")
+    finally:
+        sys.path.remove(str(folder))
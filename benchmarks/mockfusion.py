@@ -0,0 +1,231 @@
+#Stand-ins for the parts of the Fusion api the scripts use, so they can run and be timed without
+#Fusion. Each listing or lookup that would be a cloud round trip sleeps for latency seconds and is
+#counted in calls
+import itertools
+import time
+
+ids = itertools.count(1)
+
+
+class MockDataFile:
+
+    def __init__(self, name):
+        self.name = name
+        self.id = f"urn:mock:file:{next(ids)}"
+        self.versionNumber = 1
+        self.versionId = f"{self.id}?version=1"
+        self.copies = []
+
+    def newVersion(self):
+        #Like saving the file again in Fusion
+        self.versionNumber += 1
+        self.versionId = f"{self.id}?version={self.versionNumber}"
+
+    def copy(self, folder):
+        newFile = MockDataFile(self.name)
+        folder.files.append(newFile)
+        self.copies.append(newFile)
+        return newFile
+
+
+class MockDataFolder:
+
+    def __init__(self, name, calls, latency=0.0):
+        self.name = name
+        self.id = f"urn:mock:folder:{next(ids)}"
+        self.calls = calls
+        self.latency = latency
+        self.folders = []
+        self.files = []
+
+    def addFolder(self, name):
+        folder = MockDataFolder(name, self.calls, self.latency)
+        self.folders.append(folder)
+        return folder
+
+    def addFile(self, name):
+        file = MockDataFile(name)
+        self.files.append(file)
+        return file
+
+    def list(self, items, kind):
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        time.sleep(self.latency)
+        return list(items)
+
+    @property
+    def dataFolders(self):
+        return self.list(self.folders, "dataFolders")
+
+    @property
+    def dataFiles(self):
+        return self.list(self.files, "dataFiles")
+
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September",
+          "October", "November", "December"]
+
+
+def productionFolder(latency=0.0, calls=None):
+    # The same layout file_copy expects under the production folder
+    root = MockDataFolder("Production", {} if calls is None else calls, latency)
+    patients = root.addFolder("2024 Patient Files")
+    for month in MONTHS:
+        patients.addFolder(month)
+    starters = root.addFolder("Ascender Fitment Starters")
+    starters.addFile("A3_Rigid_Base_File")
+    starters.addFile("A3_Base_File")
+    kafo = root.addFolder("KAFO")
+    kafoStarters = kafo.addFolder("KAFO Starter Files")
+    for code in ("TAP", "TAD", "TPD", "TPP"):
+        kafoStarters.addFile(f"A2_{code}_Starter_File")
+    kafo.addFolder("2024 KAFO Patient Files")
+    root.addFolder("Wireframe Test Fits")
+    return root
+
+
+class MockCollection:
+    # Fusion style collection: item(i), itemByName(name), count and iteration. Every lookup is a call
+    # into Fusion, so it is counted under kind
+
+    def __init__(self, items, calls, kind):
+        self.items = items
+        self.calls = calls
+        self.kind = kind
+
+    def call(self):
+        self.calls[self.kind] = self.calls.get(self.kind, 0) + 1
+
+    def item(self, i):
+        self.call()
+        return self.items[i]
+
+    def itemByName(self, name):
+        self.call()
+        return next((item for item in self.items if item.name == name), None)
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class MockPoint:
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+class MockSketchPoint:
+
+    isValid = True
+
+    def __init__(self, point):
+        self.point = point
+
+    @property
+    def worldGeometry(self):
+        return MockPoint(*self.point)
+
+
+class MockFittedSpline:
+
+    isValid = True
+
+    def __init__(self, points, calls):
+        self.fitPoints = MockCollection([MockSketchPoint(point) for point in points], calls, "fitPoints.item")
+
+
+class MockSketch:
+
+    # move() takes the translation as an (x, y, z) tuple. Moves recompute the sketch unless its
+    # compute or the design's is deferred, in which case it recomputes once when its own deferral
+    # is turned off, or with the design
+
+    isValid = True
+    design = None
+
+    def __init__(self, name, calls, pointCount=8, design=None):
+        self.name = name
+        self.calls = calls
+        self.design = design
+        self.deferred = False
+        spline = MockFittedSpline([(i, i, i) for i in range(pointCount)], calls)
+        self.sketchCurves = type("SketchCurves", (), {})()
+        self.sketchCurves.sketchFittedSplines = MockCollection([spline], calls, "sketchFittedSplines.item")
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def designDeferred(self):
+        return self.design is not None and self.design.deferred
+
+    def move(self, group, translation):
+        self.count("move")
+        for point in group:
+            point.point = tuple(p + t for p, t in zip(point.point, translation))
+        if not self.deferred and not self.designDeferred():
+            self.count("recompute")
+
+    @property
+    def isComputeDeferred(self):
+        return self.deferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, deferred):
+        if self.deferred and not deferred and not self.designDeferred():
+            self.count("recompute")
+        self.deferred = deferred
+
+
+class MockOccurrence:
+
+    isValid = True
+
+    def __init__(self, name):
+        self.name = name
+
+
+def starterRoot(calls, design=None):
+    # Root component with the sketches and hinges fitFrame works on in the starter files
+    names = [f"CS-{i}" for i in range(1, 25)] + [f"IP-{i}" for i in range(1, 14)] + ["IP-4.5", "IP-5.5"]
+    names += ["BIP-14", "BIP-24", "Pipe-rail-1", "Strap pos"] + [f"rail-{i}" for i in range(1, 6)]
+    root = type("Component", (), {})()
+    root.sketches = MockCollection([MockSketch(name, calls, 26, design) for name in names], calls, "sketches.itemByName")
+    root.occurrences = MockCollection([MockOccurrence("LateralHinge:1"), MockOccurrence("MedialHinge:1")], calls, "occurrences.itemByName")
+    return root
+
+
+class MockDesign:
+
+    # Every edit recomputes the design unless its compute is deferred, and turning the deferral off
+    # recomputes once. With supportsDeferral off, isComputeDeferred raises like on a design that
+    # can't defer
+
+    def __init__(self, calls, supportsDeferral=True):
+        self.calls = calls
+        self.supportsDeferral = supportsDeferral
+        self.deferred = False
+        self.rootComponent = starterRoot(calls, self)
+
+    def edit(self):
+        # A feature edit like the move features hinge_mover adds
+        self.calls["edit"] = self.calls.get("edit", 0) + 1
+        if not self.deferred:
+            self.calls["recompute"] = self.calls.get("recompute", 0) + 1
+
+    @property
+    def isComputeDeferred(self):
+        if not self.supportsDeferral:
+            raise RuntimeError("compute deferral isn't supported")
+        return self.deferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, deferred):
+        if not self.supportsDeferral:
+            raise RuntimeError("compute deferral isn't supported")
+        if self.deferred and not deferred:
+            self.calls["recompute"] = self.calls.get("recompute", 0) + 1
+        self.deferred = deferred
@@ -0,0 +1,223 @@
+#Local stand-in for the sandcastle API so the Api client can be benchmarked without the network.
+#Speaks keep-alive HTTP/1.1 and counts connections, requests and bytes sent
+import gzip
+import itertools
+import json
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import synthetic
+
+TOKEN = "stand-in-token"
+tokenIds = itertools.count(1)
+
+
+class SandcastleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        sandcastle = self.server.sandcastle
+        sandcastle.count("connections")
+        if sandcastle.handshake:
+            time.sleep(sandcastle.handshake)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"null")
+        if self.path == "/api/user/token":
+            self.server.sandcastle.count("logins")
+            return self.send(200, {"token": self.server.sandcastle.token})
+        if not self.authorized():
+            return
+        match = re.fullmatch(r"/api/fusionFile/(\d+)/delete", self.path)
+        if match:
+            self.server.sandcastle.count("deletes")
+            if not self.server.sandcastle.keep:
+                self.server.sandcastle.remove(int(match.group(1)))
+            return self.send(200, {})
+        self.send(404, {"error": "not found"})
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        sandcastle = self.server.sandcastle
+        path = self.path.split("?")[0]
+        if path == "/api/fusionFile/all":
+            return self.sendListing()
+        match = re.fullmatch(r"/api/fusionFile/(\d+)", path)
+        if match and int(match.group(1)) in sandcastle.files:
+            return self.sendFile(int(match.group(1)))
+        self.send(404, {"error": "not found"})
+
+    def sendFile(self, fileId):
+        #Each file's ETag changes whenever the file does, and If-None-Match with the current one gets a 304
+        sandcastle = self.server.sandcastle
+        with sandcastle.lock:
+            headers = {"etag": f'"{fileId}-{sandcastle.changed[fileId]}"'}
+        if self.headers.get("if-none-match") == headers["etag"]:
+            sandcastle.count("notModified")
+            return self.send(304, None, headers=headers)
+        self.send(200, sandcastle.files[fileId], cacheKey=fileId, headers=headers)
+
+    def sendListing(self):
+        #Answers If-None-Match and If-Modified-Since with a 304 while the listing hasn't changed. With
+        #incremental on, ?changedSince=<cursor> gets just the entries changed or removed since then
+        sandcastle = self.server.sandcastle
+        with sandcastle.lock:
+            revision, modified = sandcastle.revision, sandcastle.modified
+        headers = {"etag": f'"{revision}"', "last-modified": formatdate(modified, usegmt=True)}
+        if sandcastle.incremental:
+            headers["x-cursor"] = str(revision)
+
+        etag = self.headers.get("if-none-match")
+        since = self.headers.get("if-modified-since")
+        if etag is not None:
+            notModified = etag == headers["etag"]
+        else:
+            notModified = since is not None and parsedate_to_datetime(since).timestamp() >= int(modified)
+        if notModified:
+            return self.send(304, None, headers=headers)
+
+        cursor = parse_qs(urlsplit(self.path).query).get("changedSince")
+        if sandcastle.incremental and cursor:
+            return self.send(200, sandcastle.changes(int(cursor[0])), headers=headers)
+        self.send(200, sandcastle.listing(), headers=headers)
+
+    def authorized(self):
+        if self.headers.get("Authorization") == self.server.sandcastle.token:
+            return True
+        self.send(401, {"error": "unauthorized"})
+        return False
+
+    def send(self, status, payload, cacheKey=None, headers=None):
+        #Gzips the body when the client accepts it and the stand-in is set to compress. cacheKey keeps
+        #the encoded body of a file around so it isn't compressed again on every request. A 304 has
+        #no body
+        sandcastle = self.server.sandcastle
+        if sandcastle.latency:
+            time.sleep(sandcastle.latency)
+        compress = sandcastle.compress and "gzip" in self.headers.get("accept-encoding", "")
+        body = sandcastle.bodies.get((cacheKey, compress)) if cacheKey is not None else None
+        if status == 304:
+            body, compress = b"", False
+        if body is None:
+            body = json.dumps(payload, separators=(",", ":")).encode()
+            if compress:
+                body = gzip.compress(body, 6)
+            if cacheKey is not None:
+                sandcastle.bodies[(cacheKey, compress)] = body
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        if compress:
+            self.send_header("content-encoding", "gzip")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        sandcastle.count("requests")
+        sandcastle.count("bytesSent", len(body))
+
+
+class Sandcastle:
+    #Serves fileCount builder files with ids starting at 1. latency is added to every response and
+    #handshake to every new connection, standing in for the TLS round trips of the real server. With
+    #compress, bodies are gzipped for clients that accept it. The listing carries an ETag and
+    #Last-Modified, and with incremental a cursor for asking only for what changed. With shared the
+    #meshes are closed legs that share their vertices, like real scans, instead of loose facets. With
+    #keep, deleting a builder file is answered but the file stays queued, like a run that crashed
+    #before it got to the delete. Listing entries only carry id and name, the same as the real ones
+
+    def __init__(self, fileCount=10, facetCount=200, latency=0.0, handshake=0.0, seed=0, compress=False, incremental=False, shared=False, keep=False):
+        self.latency = latency
+        self.handshake = handshake
+        self.compress = compress
+        self.incremental = incremental
+        self.facetCount = facetCount
+        self.shared = shared
+        self.keep = keep
+        self.seed = seed
+        self.bodies = {}
+        self.files = {
+            fileId: synthetic.builderFile(fileId, 1000 + fileId, facetCount, seed=seed + fileId, shared=shared)
+            for fileId in range(1, fileCount + 1)
+        }
+        #Every change bumps the revision. Files remember the revision they last changed in, and
+        #removed files the one they left in
+        self.revision = 0
+        self.modified = time.time()
+        self.changed = dict.fromkeys(self.files, 0)
+        self.removed = {}
+        self.token = TOKEN
+        self.counters = {"connections": 0, "requests": 0, "bytesSent": 0, "logins": 0, "notModified": 0, "deletes": 0}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def revoke(self):
+        #Turns down the current token from now on, like an expired or revoked one
+        self.token = f"{TOKEN}-{next(tokenIds)}"
+
+    def listing(self):
+        return [self.entry(f) for f in self.files.values()]
+
+    def entry(self, file):
+        return {"id": file["id"], "name": file["name"]}
+
+    def changes(self, cursor):
+        with self.lock:
+            return {
+                "changed": [self.entry(f) for fileId, f in self.files.items() if self.changed[fileId] > cursor],
+                "removed": [fileId for fileId, revision in self.removed.items() if revision > cursor]
+            }
+
+    def touch(self, fileId):
+        #Marks the file as changed, or adds it to the queue if it isn't there
+        with self.lock:
+            self.revision += 1
+            self.modified = time.time()
+            if fileId not in self.files:
+                self.files[fileId] = synthetic.builderFile(fileId, 1000 + fileId, self.facetCount, seed=self.seed + fileId, shared=self.shared)
+            self.changed[fileId] = self.revision
+            self.removed.pop(fileId, None)
+            self.bodies.pop((fileId, True), None)
+            self.bodies.pop((fileId, False), None)
+
+    def remove(self, fileId):
+        with self.lock:
+            if self.files.pop(fileId, None) is not None:
+                self.revision += 1
+                self.modified = time.time()
+                self.changed.pop(fileId, None)
+                self.removed[fileId] = self.revision
+
+    def config(self):
+        #Config dict for Api.Api pointing at this server
+        host, port = self.server.server_address
+        return {
+            "isProd": False,
+            "api": {"url": f"{host}:{port}", "email": "bench@example.com", "password": "bench", "tokenCache": None},
+        }
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SandcastleHandler)
+        self.server.daemon_threads = True
+        self.server.sandcastle = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,270 @@
+#The whole benchmark suite in one run, saved as JSON so runs on different commits can be compared.
+#Everything runs locally: meshes come from synthetic, the builder from the sandcastle stand-in and
+#Fusion from the recording mock in mockadsk. Scenarios:
+#  parse   parseStl on ascii and binary legs: seconds, facets and MB per second, peak memory
+#  index   indexMesh on the parsed legs, and decimate to a tenth of them with numpy
+#  api     downloading and decoding every builder file: files per second, bytes, peak memory
+#  batch   File_Creator end to end, opening every order: wall time, peak memory, Fusion calls,
+#          requests and the run report's stages. "rerun" runs it again with nothing changed, and
+#          "templates" runs the same orders from locally cached starter files (templateCache)
+#Seconds are timed without tracemalloc, the peak is from a second run under it
+#Usage: python benchmarks/suite.py [--quick] [--only parse,batch] [--output results.json]
+#       python benchmarks/suite.py --compare before.json after.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Api
+import IndexedMesh
+import Stl
+import mockadsk
+import synthetic
+from sandcastle import Sandcastle
+
+RESULTS = Path(__file__).resolve().parent / "results"
+
+#Sizes for a full run and for --quick
+SIZES = {
+    "full": {"parseFacets": (10_000, 100_000, 500_000), "indexFacets": (100_000, 500_000), "files": 20, "fileFacets": 20_000},
+    "quick": {"parseFacets": (10_000, 50_000), "indexFacets": (50_000,), "files": 5, "fileFacets": 5_000},
+}
+
+
+def measure(run):
+    # (seconds, peak bytes, result of the timed run)
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def benchParse(sizes):
+    results = {}
+    for facetCount in sizes["parseFacets"]:
+        for binary in (False, True):
+            data = synthetic.leg(facetCount, binary)
+            seconds, peak, parsed = measure(lambda: Stl.parseStl(data))
+            facets = len(parsed[2]) // 3
+            results[f"{'binary' if binary else 'ascii'}-{facetCount}"] = {
+                "facets": facets,
+                "bytes": len(data),
+                "seconds": seconds,
+                "facetsPerSecond": facets / seconds,
+                "mbPerSecond": len(data) / 1e6 / seconds,
+                "peakMB": peak / 1e6,
+            }
+    return results
+
+
+def benchIndex(sizes):
+    results = {}
+    for facetCount in sizes["indexFacets"]:
+        _, coordinates, normalVectors = Stl.parseStl(synthetic.leg(facetCount, True))
+        seconds, peak, mesh = measure(lambda: IndexedMesh.indexMesh(coordinates, normalVectors))
+        result = {
+            "facets": len(normalVectors) // 3,
+            "vertices": mesh.vertexCount,
+            "dedupRatio": mesh.dedupRatio,
+            "seconds": seconds,
+            "peakMB": peak / 1e6,
+        }
+        if IndexedMesh.np is not None:
+            budget = mesh.triangleCount // 10
+            decimateSeconds, decimatePeak, decimated = measure(lambda: IndexedMesh.decimate(mesh, budget))
+            result["decimate"] = {
+                "budget": budget,
+                "triangles": decimated.triangleCount,
+                "maxErrorMM": decimated.maxError,
+                "seconds": decimateSeconds,
+                "peakMB": decimatePeak / 1e6,
+            }
+        results[str(facetCount)] = result
+    return results
+
+
+def benchApi(sizes):
+    with Sandcastle(sizes["files"], sizes["fileFacets"], compress=True, shared=True) as server:
+        api = Api.Api(server.config())
+        endpoints = [f"/api/fusionFile/{fileId}" for fileId in server.files]
+        # Warm the stand-in's body cache so encoding doesn't count towards the client
+        list(api.getMany(endpoints))
+
+        def download():
+            return sum(len(response.data["mesh"]["data"]) for response in api.getMany(endpoints))
+
+        sentBefore = server.counters["bytesSent"]
+        seconds, peak, meshBytes = measure(download)
+        api.close()
+        return {
+            "files": len(endpoints),
+            "meshBytes": meshBytes,
+            "bytesSent": (server.counters["bytesSent"] - sentBefore) // 2,
+            "seconds": seconds,
+            "filesPerSecond": len(endpoints) / seconds,
+            "peakMB": peak / 1e6,
+        }
+
+
+def runBatch(server, folder, app, traced=False, **flags):
+    # One File_Creator run with flags added to its config. The mock app's call counts and the
+    # stand-in's counters are read as what this run added to them
+    calls, counters = dict(app.calls), dict(server.counters)
+    config = server.config()
+    config.update(deferCompute=True, batchRailMoves=True, indexMesh=True, **flags)
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        mockadsk.loadFileCreator(folder, config, app)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if traced else None
+    finally:
+        if traced:
+            tracemalloc.stop()
+
+    reports = sorted((Path(folder) / "filecreator" / "reports").glob("run-*.json"))
+    with open(reports[-1]) as f:
+        report = json.load(f)
+    fusionCalls = {name: count - calls.get(name, 0) for name, count in app.calls.items() if count != calls.get(name, 0)}
+    return {
+        "seconds": seconds,
+        "peakMB": peak / 1e6 if traced else None,
+        "orders": len(report["orders"]),
+        "fusionCalls": dict(sorted(fusionCalls.items())),
+        # meshBodies.values counts the floats and indices handed over, not calls
+        "fusionCallTotal": sum(count for name, count in fusionCalls.items() if not name.endswith(".values")),
+        "requests": server.counters["requests"] - counters["requests"],
+        "bytesSent": server.counters["bytesSent"] - counters["bytesSent"],
+        "stages": {name: round(stage["seconds"], 4) for name, stage in sorted(report["stages"].items())},
+        "counters": report["counters"],
+        "templates": report.get("templates"),
+    }
+
+
+def benchBatch(sizes):
+    # Runs remove the builder files they import, so every fresh run gets a fresh stand-in
+    def builder():
+        return Sandcastle(sizes["files"], sizes["fileFacets"], compress=True, incremental=True, shared=True)
+
+    with builder() as server, tempfile.TemporaryDirectory() as folder:
+        app = mockadsk.MockApplication(answer="open")
+        first = runBatch(server, folder, app)
+        # Report file names only go down to the second
+        time.sleep(1)
+        rerun = runBatch(server, folder, app)
+    with builder() as server, tempfile.TemporaryDirectory() as folder:
+        traced = runBatch(server, folder, mockadsk.MockApplication(answer="open"), traced=True)
+        first["peakMB"] = traced["peakMB"]
+    with builder() as server, tempfile.TemporaryDirectory() as folder:
+        templates = runBatch(server, folder, mockadsk.MockApplication(answer="open"), templateCache=True)
+
+    # Every run but the rerun has to have imported the whole queue, or it measured an empty one
+    for label, result in (("first", first), ("peak", traced), ("templates", templates)):
+        if result["orders"] != sizes["files"]:
+            raise Exception(f"Batch run {label} imported {result['orders']} of {sizes['files']} orders")
+    return {"first": first, "rerun": rerun, "templates": templates}
+
+
+SCENARIOS = {"parse": benchParse, "index": benchIndex, "api": benchApi, "batch": benchBatch}
+
+
+def metadata(quick):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=Path(__file__).parent,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    try:
+        import numpy
+        numpyVersion = numpy.__version__
+    except ImportError:
+        numpyVersion = None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": numpyVersion,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sizes": "quick" if quick else "full",
+    }
+
+
+def flatten(value, prefix=""):
+    # {"parse": {"ascii-10000": {"seconds": 1}}} -> {"parse.ascii-10000.seconds": 1}, numbers only
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(beforePath, afterPath):
+    with open(beforePath) as f:
+        before = json.load(f)
+    with open(afterPath) as f:
+        after = json.load(f)
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    old, new = flatten(before["results"]), flatten(after["results"])
+    width = max(len(key) for key in old.keys() | new.keys())
+    print(f"{'':<{width}} {'before':>12} {'after':>12} {'change':>8}")
+    for key in sorted(old.keys() | new.keys()):
+        a, b = old.get(key), new.get(key)
+        change = f"{(b - a) / a * 100:+7.1f}%" if a and b is not None else ""
+        print(f"{key:<{width}} {'-' if a is None else f'{a:.4g}':>12} {'-' if b is None else f'{b:.4g}':>12} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmark suite and saves the results as JSON")
+    parser.add_argument("--quick", action="store_true", help="smaller meshes and fewer files")
+    parser.add_argument("--only", help="comma separated scenarios: " + ",".join(SCENARIOS))
+    parser.add_argument("--output", help="where to write the results, benchmarks/results/<commit>.json by default")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results files")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            raise Exception(f"Unknown scenario {name}, expected one of {', '.join(SCENARIOS)}")
+
+    sizes = SIZES["quick" if args.quick else "full"]
+    meta = metadata(args.quick)
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results[name] = SCENARIOS[name](sizes)
+        print(f"{name}: {time.perf_counter() - start:.1f}s")
+
+    output = Path(args.output) if args.output else RESULTS / f"{meta['commit'] or 'results'}{'-dirty' if meta['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#Synthetic meshes and builder files for the benchmarks, shaped like what the builder sends us
+import math
+import random
+import struct
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Stl
+
+#Every wireframe key pointCreator reads
+WIREFRAME_KEYS = (
+    "leftHingePos", "rightHingePos",
+    "topCuffPos", "topLeftCuffPos", "topLeftFramePos", "topLeftPos",
+    "topRightCuffPos", "topRightFramePos", "topRightPos",
+    "botCuffPos", "botLeftCuffPos", "botLeftFramePos", "botLeftPos",
+    "botRightCuffPos", "botRightFramePos", "botRightPos",
+)
+
+
+def asciiStl(facetCount, name="leg", seed=0):
+    #Builds a synthetic ascii .stl with the same line layout our scanners write
+    rng = random.Random(seed)
+    lines = [f"solid {name}"]
+    for _ in range(facetCount):
+        theta = rng.uniform(0, 2 * math.pi)
+        z = rng.uniform(0, 400)
+        x, y = 60 * math.cos(theta), 45 * math.sin(theta)
+        lines.append(f"  facet normal {math.cos(theta):e} {math.sin(theta):e} {0:e}")
+        lines.append("    outer loop")
+        for dx, dy, dz in ((0, 0, 0), (1.5, 0.2, 0), (0.1, 1.2, 1.4)):
+            lines.append(f"      vertex {x + dx:e} {y + dy:e} {z + dz:e}")
+        lines.append("    endloop")
+        lines.append("  endfacet")
+    lines.append(f"endsolid {name}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def binaryStl(facetCount, name="leg", seed=0):
+    #Same mesh as asciiStl, written as a binary .stl
+    _, coordinates, normalVectors = Stl.parseAsciiPython(asciiStl(facetCount, name, seed))
+    records = b"".join(
+        struct.pack("<12fH", *normalVectors[i * 3:i * 3 + 3], *coordinates[i * 9:i * 9 + 9], 0)
+        for i in range(facetCount))
+    return f"solid {name}".encode().ljust(80, b"\0") + struct.pack("<I", facetCount) + records
+
+
+def legStl(rings, segments, name="leg", seed=0):
+    #A closed, watertight tube capped at both ends like a scanned leg, as an ascii .stl. Unlike
+    #asciiStl every vertex is shared by about six facets, which is what indexing a mesh counts on
+    rng = random.Random(seed)
+    radii = [(60 + rng.uniform(-3, 3), 45 + rng.uniform(-3, 3)) for _ in range(rings)]
+
+    def point(ring, segment):
+        theta = 2 * math.pi * (segment % segments) / segments
+        rx, ry = radii[ring]
+        return (rx * math.cos(theta), ry * math.sin(theta), 400 * ring / (rings - 1))
+
+    facets = []
+    for ring in range(rings - 1):
+        for segment in range(segments):
+            a, b = point(ring, segment), point(ring, segment + 1)
+            c, d = point(ring + 1, segment + 1), point(ring + 1, segment)
+            facets += [(a, b, c), (a, c, d)]
+    for ring, flip in ((0, True), (rings - 1, False)):
+        center = (0.0, 0.0, 400 * ring / (rings - 1))
+        for segment in range(segments):
+            a, b = point(ring, segment), point(ring, segment + 1)
+            facets.append((center, b, a) if flip else (center, a, b))
+
+    lines = [f"solid {name}"]
+    for corners in facets:
+        lines.append("  facet normal 0.000000e+00 0.000000e+00 0.000000e+00")
+        lines.append("    outer loop")
+        for x, y, z in corners:
+            lines.append(f"      vertex {x:e} {y:e} {z:e}")
+        lines.append("    endloop")
+        lines.append("  endfacet")
+    lines.append(f"endsolid {name}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def leg(facetCount, binary=False, name="leg", seed=0):
+    #legStl sized to about facetCount facets, a bit over twice as tall as it is around, as ascii or
+    #binary. The count comes out rounded to whole rings
+    segments = max(8, round(math.sqrt(facetCount / 5)))
+    rings = max(2, round(facetCount / (2 * segments)))
+    data = legStl(rings, segments, name, seed)
+    return toBinary(data) if binary else data
+
+
+def toBinary(data):
+    #An ascii .stl rewritten as a binary one with the same facets
+    name, coordinates, normalVectors = Stl.parseStl(data)
+    coordinates, normalVectors = coordinates.tolist(), normalVectors.tolist()
+    facetCount = len(normalVectors) // 3
+    records = b"".join(
+        struct.pack("<12fH", *normalVectors[i * 3:i * 3 + 3], *coordinates[i * 9:i * 9 + 9], 0)
+        for i in range(facetCount))
+    return f"solid {name}".encode().ljust(80, b"\0") + struct.pack("<I", facetCount) + records
+
+
+def wireframe(seed=0):
+    #Random but plausible builder wireframe in millimeters: x is medial/lateral, y runs up the leg
+    #with the hinges at 0, z is front to back
+    rng = random.Random(seed)
+    frame = {}
+    for key in WIREFRAME_KEYS:
+        x = -55 if "Left" in key else 55 if "Right" in key else 0
+        y = 0 if "Hinge" in key else rng.uniform(90, 160) if key.startswith("top") else -rng.uniform(90, 160)
+        z = rng.uniform(-20, 20) if "Cuff" in key else rng.uniform(-5, 5)
+        frame[key] = [x + rng.uniform(-8, 8), y, z]
+    return frame
+
+
+def order(orderId, seed=0, status="Open", kafo=False):
+    #Order data in the shape getOrder reads from a fusion file
+    rng = random.Random(seed)
+    return {
+        "id": orderId,
+        "patientName": f"Patient {orderId}",
+        "catalog": {"name": "KAFO - Custom" if kafo else "Ascender"},
+        "lastJobEvent": None,
+        "engraving": "",
+        "leg": {"name": rng.choice(["Left", "Right"])},
+        "product": {"serialTop": f"T{orderId}", "serialBot": f"B{orderId}"},
+        "location": {"account": {"id": rng.randint(1, 5), "type": {"id": rng.randint(1, 3)}}},
+        "travelerStatus": "NEW",
+        "status": {"name": status},
+        "hasRigidFrame": rng.random() < 0.3,
+    }
+
+
+def builderFile(fileId, orderId, facetCount=1000, seed=0, binary=False, kafo=False, shared=False):
+    #A full /api/fusionFile/{id} payload. The mesh comes through as a serialized Node Buffer. With
+    #shared it's a closed leg from leg() instead of loose facets
+    if shared:
+        mesh = leg(facetCount, binary, seed=seed)
+    else:
+        mesh = binaryStl(facetCount, seed=seed) if binary else asciiStl(facetCount, seed=seed)
+    side = "TAD" if kafo else "L"
+    name = f"{orderId}_Patient_{orderId}_{side}" + ("_A2" if kafo else "")
+    return {
+        "id": fileId,
+        "name": name,
+        "order": order(orderId, seed, kafo=kafo),
+        "mesh": {"type": "Buffer", "data": list(mesh)},
+        "wireframe": wireframe(seed),
+    }